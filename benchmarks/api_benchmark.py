@@ -0,0 +1,176 @@
+"""
+Compare requests/second and p99 latency of the Flask and ASGI serving paths.
+
+Kubernetes and AWS are replaced by local stand-ins: the informer store is filled with synthetic
+canaries and every write sleeps for --write-latency seconds, like a slow API server round-trip.
+
+    python -m benchmarks.api_benchmark --canaries 500 --concurrency 32 --duration 10
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from unittest import mock
+
+
+def make_canaries(count):
+    """
+    Build synthetic LambdaCanary objects.
+    """
+    return [
+        {
+            "metadata": {"name": f"canary-{i}", "resourceVersion": str(i + 1)},
+            "functionName": f"function-{i}",
+            "newVersion": "2",
+            "oldVersion": "1",
+            "policy": {"step": 10, "threshold": 0.05, "cooldown": 60}
+        }
+        for i in range(count)
+    ]
+
+
+def slow_write(latency):
+    """
+    Build a stand-in for a Kubernetes write helper that takes the given number of seconds.
+    """
+    def write(*args):
+        time.sleep(latency)
+    write.__name__ = "slow_write"
+    return write
+
+
+def load_flask_app(canaries, write):
+    """
+    Import controller.api with the Kubernetes configuration and API objects replaced by stand-ins.
+
+    The controller is never started, so the informer store is only filled with the synthetic canaries.
+    """
+    from controller import kubernetes
+    from controller.context import ControllerContext
+
+    patches = [
+        mock.patch.object(ControllerContext, "_load_kube_config", return_value=True),
+        mock.patch("kubernetes.client.CustomObjectsApi"),
+    ]
+    for name in ("create_canary_deployment", "update_canary_deployment", "delete_canary_deployment"):
+        patches.append(mock.patch.object(kubernetes, name, write))
+    for patch in patches:
+        patch.start()
+    from controller import api
+    api.context.informer.store.replace(canaries, str(len(canaries)))
+    return api
+
+
+def serve_flask(api, port):
+    """
+    Serve the Flask application with the threaded werkzeug server, like app.run does.
+    """
+    from werkzeug.serving import make_server
+    server = make_server("127.0.0.1", port, api.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown
+
+
+def serve_asgi(api, port, write):
+    """
+    Serve the ASGI application with uvicorn.
+    """
+    import uvicorn
+    from controller.asgi import create_app
+    app = create_app(api.context.informer.store, write, write, write)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+    return stop
+
+
+def make_token():
+    """
+    Mint a bearer token that passes the routes' role checks.
+    """
+    import jwt
+    from controller.config import JWT_SECRET
+    return jwt.encode({"sub": "benchmark", "roles": ["admin"], "exp": int(time.time()) + 3600}, JWT_SECRET, algorithm="HS256")
+
+
+def run_load(port, canaries, concurrency, duration, write_ratio):
+    """
+    Hammer a server with GET and PUT requests from concurrent keep-alive clients.
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    authorization = {"Authorization": f"Bearer {make_token()}"}
+
+    def client():
+        rng = random.Random()
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        local = []
+        local_errors = 0
+        while time.monotonic() < deadline:
+            name = rng.choice(canaries)["metadata"]["name"]
+            started = time.perf_counter()
+            if rng.random() < write_ratio:
+                connection.request("PUT", f"/canary/{name}", body=json.dumps({"newVersion": "3"}),
+                                   headers={"Content-Type": "application/json", **authorization})
+            else:
+                connection.request("GET", f"/canary/{name}", headers=authorization)
+            response = connection.getresponse()
+            response.read()
+            local.append(time.perf_counter() - started)
+            if response.status != 200:
+                local_errors += 1
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--canaries", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--write-latency", type=float, default=0.05)
+    parser.add_argument("--port", type=int, default=18080)
+    args = parser.parse_args()
+
+    canaries = make_canaries(args.canaries)
+    write = slow_write(args.write_latency)
+    api = load_flask_app(canaries, write)
+    results = {}
+    for mode, serve in (("flask", lambda port: serve_flask(api, port)),
+                        ("asgi", lambda port: serve_asgi(api, port, write))):
+        port = args.port + len(results)
+        stop = serve(port)
+        results[mode] = run_load(port, canaries, args.concurrency, args.duration, args.write_ratio)
+        stop()
+    print(json.dumps({"parameters": vars(args), "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
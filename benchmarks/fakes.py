@@ -0,0 +1,215 @@
+"""
+In-process stand-ins for Lambda, CloudWatch and the Kubernetes CustomObjects API.
+
+Every fake counts its calls per operation and can inject latency and throttling, so benchmarks can
+measure how many round-trips the controller makes without touching real services.
+"""
+import collections
+import copy
+import io
+import math
+import random
+import threading
+import time
+from datetime import timedelta
+
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+
+
+class FaultInjector:
+    def __init__(self, latency=0.0, throttle_rate=0.0, seed=None):
+        self._latency = latency
+        self._throttle_rate = throttle_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = collections.Counter()
+
+    def call(self, operation):
+        """
+        Count a call, sleep for the injected latency and raise a throttling error at the injected rate.
+        """
+        with self._lock:
+            self.calls[operation] += 1
+            throttled = self._random.random() < self._throttle_rate
+        if self._latency:
+            time.sleep(self._latency)
+        if throttled:
+            raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}}, operation)
+
+
+class FakeLambda:
+    def __init__(self, faults):
+        self._faults = faults
+        self._lock = threading.Lock()
+        self._aliases = {}
+        self._provisioned = {}
+        self._revisions = 0
+
+    def add_alias(self, function_name, alias_name, function_version):
+        """
+        Create an alias pointing at a version, as if it existed before the rollout.
+        """
+        self._aliases[(function_name, alias_name)] = self._alias(alias_name, function_version, {})
+
+    def routing(self, function_name, alias_name):
+        """
+        Get the share of an alias's traffic per version.
+        """
+        with self._lock:
+            alias = self._aliases[(function_name, alias_name)]
+        weights = dict(alias["RoutingConfig"]["AdditionalVersionWeights"])
+        weights[alias["FunctionVersion"]] = 1 - sum(weights.values())
+        return weights
+
+    def update_alias(self, FunctionName, Name, FunctionVersion, RoutingConfig=None, RevisionId=None):
+        self._faults.call("UpdateAlias")
+        with self._lock:
+            current = self._aliases[(FunctionName, Name)]
+            if RevisionId and RevisionId != current["RevisionId"]:
+                raise ClientError({"Error": {"Code": "PreconditionFailedException", "Message": "Revision changed"}},
+                                  "UpdateAlias")
+            alias = self._alias(Name, FunctionVersion, (RoutingConfig or {}).get("AdditionalVersionWeights", {}))
+            self._aliases[(FunctionName, Name)] = alias
+            return copy.deepcopy(alias)
+
+    def get_alias(self, FunctionName, Name):
+        self._faults.call("GetAlias")
+        with self._lock:
+            return copy.deepcopy(self._aliases[(FunctionName, Name)])
+
+    def get_function(self, FunctionName, Qualifier):
+        self._faults.call("GetFunction")
+        return {"Configuration": {"FunctionName": FunctionName, "Version": Qualifier, "CodeSha256": "fake"}}
+
+    def put_provisioned_concurrency_config(self, FunctionName, Qualifier, ProvisionedConcurrentExecutions):
+        self._faults.call("PutProvisionedConcurrencyConfig")
+        with self._lock:
+            self._provisioned[(FunctionName, Qualifier)] = {
+                "RequestedProvisionedConcurrentExecutions": ProvisionedConcurrentExecutions,
+                "Status": "IN_PROGRESS"
+            }
+            return {"Status": "IN_PROGRESS"}
+
+    def get_provisioned_concurrency_config(self, FunctionName, Qualifier):
+        """
+        Report an allocation as IN_PROGRESS once and as READY from then on.
+        """
+        self._faults.call("GetProvisionedConcurrencyConfig")
+        with self._lock:
+            config = self._provisioned.get((FunctionName, Qualifier))
+            if config is None:
+                raise ClientError({"Error": {"Code": "ProvisionedConcurrencyConfigNotFoundException",
+                                             "Message": "No provisioned concurrency"}}, "GetProvisionedConcurrencyConfig")
+            response = dict(config)
+            config["Status"] = "READY"
+            return response
+
+    def delete_provisioned_concurrency_config(self, FunctionName, Qualifier):
+        self._faults.call("DeleteProvisionedConcurrencyConfig")
+        with self._lock:
+            self._provisioned.pop((FunctionName, Qualifier), None)
+
+    def provisioned(self):
+        """
+        Get the number of versions that still hold provisioned concurrency.
+        """
+        with self._lock:
+            return len(self._provisioned)
+
+    def invoke(self, FunctionName, Payload, Qualifier=None):
+        self._faults.call("Invoke")
+        return {"StatusCode": 200, "Payload": StreamingBody(io.BytesIO(b"{}"), 2)}
+
+    def _alias(self, name, function_version, weights):
+        self._revisions += 1
+        return {
+            "Name": name,
+            "FunctionVersion": function_version,
+            "RoutingConfig": {"AdditionalVersionWeights": dict(weights)},
+            "RevisionId": str(self._revisions)
+        }
+
+
+class FakeCloudWatch:
+    def __init__(self, faults, lambda_fake, traffic, requests_per_minute=1000, seed=None):
+        self._faults = faults
+        self._lambda = lambda_fake
+        self._traffic = traffic
+        self._requests_per_minute = requests_per_minute
+        self._random = random.Random(seed)
+
+    def get_metric_data(self, MetricDataQueries, StartTime, EndTime, ScanBy=None, NextToken=None):
+        """
+        Synthesize per-minute Lambda metrics from each version's share of its alias and its simulated health.
+        """
+        self._faults.call("GetMetricData")
+        minutes = []
+        minute = StartTime.replace(second=0, microsecond=0)
+        while minute < EndTime:
+            minutes.append(minute)
+            minute += timedelta(minutes=1)
+        results = []
+        for query in MetricDataQueries:
+            stat = query["MetricStat"]
+            dimensions = {dimension["Name"]: dimension["Value"] for dimension in stat["Metric"]["Dimensions"]}
+            function_name, alias_name = dimensions["Resource"].split(":", 1)
+            version = dimensions.get("ExecutedVersion")
+            share = self._lambda.routing(function_name, alias_name).get(version, 0)
+            error_rate, latency = self._traffic(function_name, version)
+            values = []
+            for _ in minutes:
+                invocations = round(self._requests_per_minute * share)
+                values.append(self._value(stat["Metric"]["MetricName"], stat["Stat"], invocations, error_rate, latency))
+            results.append({"Id": query["Id"], "Timestamps": list(minutes), "Values": values})
+        return {"MetricDataResults": results}
+
+    def _value(self, metric_name, stat, invocations, error_rate, latency):
+        if metric_name == "Invocations":
+            return invocations
+        if metric_name == "Errors":
+            mean = invocations * error_rate
+            return max(0, round(self._random.gauss(mean, math.sqrt(mean * (1 - error_rate)))))
+        if metric_name == "Throttles":
+            return 0
+        if not invocations:
+            return 0
+        factor = {"Average": 1.0, "p95": 1.6, "p99": 2.2}.get(stat, 1.0)
+        return latency * factor * self._random.uniform(0.9, 1.1)
+
+
+class FakeClientFactory:
+    def __init__(self, clients):
+        self._clients = clients
+
+    def client(self, service_name, region_name, role_arn=None):
+        return self._clients.get((service_name, region_name), self._clients.get(service_name))
+
+
+class FakeCustomObjectsApi:
+    def __init__(self, store, faults):
+        self._store = store
+        self._faults = faults
+        self._lock = threading.Lock()
+
+    def patch_namespaced_custom_object_status(self, group, version, namespace, plural, name, body):
+        self._faults.call("PatchStatus")
+        with self._lock:
+            canary = copy.deepcopy(self._store.get(name))
+            canary.setdefault("status", {}).update(body.get("status", {}))
+            canary["metadata"]["resourceVersion"] = str(int(canary["metadata"]["resourceVersion"]) + 1)
+            self._store.upsert(canary)
+            return canary
+
+    def get_namespaced_custom_object_status(self, group, version, namespace, plural, name):
+        self._faults.call("GetStatus")
+        return copy.deepcopy(self._store.get(name))
+
+
+class FakeInformer:
+    def __init__(self, store):
+        self.store = store
+        self._handlers = []
+
+    def add_handler(self, handler):
+        self._handlers.append(handler)
@@ -0,0 +1,225 @@
+"""
+Drive thousands of synthetic canaries through full rollouts against in-process fakes.
+
+Reports rollout throughput, AWS and API server calls per rollout and decision latency, and writes them
+as JSON so runs can be compared over time:
+
+    python -m benchmarks.rollout_benchmark --canaries 2000 --output results.json
+    python -m benchmarks.rollout_benchmark --canaries 2000 --compare results.json
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.fakes import (
+    FaultInjector,
+    FakeClientFactory,
+    FakeCloudWatch,
+    FakeCustomObjectsApi,
+    FakeInformer,
+    FakeLambda,
+)
+from controller.informer import CanaryStore
+from controller.journal import RolloutJournal
+from controller.metrics import BatchMetricsFetcher
+from controller.reconciler import CanaryReconciler
+from controller.regions import RegionalClients
+from controller.scheduler import DeadlineScheduler
+from controller.status import StatusWriter
+from controller.window import MetricWindowStore
+
+LambdaClient = importlib.import_module('controller.lambda').LambdaClient
+
+DONE_PHASES = ('Promoted', 'RolledBack')
+
+
+def make_canaries(count, bad_ratio, seed, cooldown, prewarm_concurrency=0, waves=None, probe_invocations=0):
+    """
+    Build synthetic LambdaCanary objects and the simulated health of their versions.
+    """
+    rng = random.Random(seed)
+    canaries = []
+    health = {}
+    policy = {"step": 10, "threshold": 0.05, "cooldown": cooldown}
+    if prewarm_concurrency:
+        policy["prewarm"] = {"concurrency": prewarm_concurrency, "invocations": 2}
+    if probe_invocations:
+        policy["probe"] = {"invocations": probe_invocations}
+    for i in range(count):
+        function_name = f"function-{i}"
+        bad = rng.random() < bad_ratio
+        health[(function_name, "1")] = (0.001, 100)
+        health[(function_name, "2")] = (0.08, 180) if bad else (0.001, 100)
+        canaries.append({
+            "metadata": {"name": f"canary-{i}", "namespace": "default", "resourceVersion": "1"},
+            "functionName": function_name,
+            "newVersion": "2",
+            "oldVersion": "1",
+            "policy": dict(policy)
+        })
+        if waves:
+            canaries[-1]["waves"] = waves
+    return canaries, health
+
+
+def run(args):
+    """
+    Run one benchmark and return its results.
+    """
+    waves = [wave.split(",") for wave in args.waves.split(";")] if args.waves else None
+    canaries, health = make_canaries(
+        args.canaries, args.bad_ratio, args.seed, args.cooldown, args.prewarm_concurrency, waves, args.probe_invocations
+    )
+    aws_faults = FaultInjector(args.aws_latency, args.throttle_rate, args.seed)
+    kube_faults = FaultInjector(args.kube_latency, 0, args.seed)
+    clients = {}
+    lambda_fakes = []
+    for region in ["fake"] + [region for wave in waves or [] for region in wave]:
+        lambda_fake = FakeLambda(aws_faults)
+        for canary in canaries:
+            lambda_fake.add_alias(canary["functionName"], "release", canary["oldVersion"])
+        cloudwatch_fake = FakeCloudWatch(aws_faults, lambda_fake,
+                                         lambda function_name, version: health[(function_name, version)],
+                                         seed=args.seed)
+        clients[("lambda", region)] = lambda_fake
+        clients[("cloudwatch", region)] = cloudwatch_fake
+        lambda_fakes.append(lambda_fake)
+    factory = FakeClientFactory(clients)
+
+    store = CanaryStore()
+    store.replace(canaries, "1")
+    status_writer = StatusWriter(FakeCustomObjectsApi(store, kube_faults), store)
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    clock = {"seconds": 0.0}
+    journal_dir = tempfile.TemporaryDirectory() if args.journal else None
+
+    def start_reconciler():
+        lambda_client = LambdaClient("fake", client_factory=factory)
+        metrics_fetcher = BatchMetricsFetcher("fake", args.metrics_budget, client_factory=factory)
+        reconciler = CanaryReconciler(
+            FakeInformer(store),
+            lambda_client,
+            metrics_fetcher,
+            MetricWindowStore(),
+            status_writer,
+            scheduler=DeadlineScheduler(clock=lambda: clock["seconds"]),
+            journal=RolloutJournal(os.path.join(journal_dir.name, "rollouts.journal")) if journal_dir else None,
+            workers=args.workers,
+            max_depth=args.canaries * 2,
+            qps=1000000,
+            burst=1000000,
+            regions=RegionalClients(lambda_client, metrics_fetcher, factory, args.metrics_budget)
+        )
+        reconciler.start(evaluate=False)
+        return reconciler
+
+    reconciler = start_reconciler()
+    recovery = {}
+
+    decision_latencies = []
+    started = time.perf_counter()
+    ticks = 0
+    done = 0
+    while ticks < args.max_ticks:
+        ticks += 1
+        now += timedelta(minutes=1)
+        clock["seconds"] += 60
+        if ticks == args.restart_at:
+            reconciler.stop()
+            recovery_started = time.perf_counter()
+            calls_before = sum(aws_faults.calls.values())
+            reconciler = start_reconciler()
+            recovery["recovery_seconds"] = round(time.perf_counter() - recovery_started, 3)
+            recovery["recovered_rollouts"] = (reconciler.recovery or {}).get("canaries", 0)
+        tick_started = time.perf_counter()
+        reconciler.tick(now)
+        reconciler.wait_idle()
+        status_writer.flush()
+        decision_latencies.append(time.perf_counter() - tick_started)
+        done = sum(1 for canary in store.list() if (canary.get("status") or {}).get("phase") in DONE_PHASES)
+        if done == len(canaries):
+            break
+    elapsed = time.perf_counter() - started
+    reconciler.stop()
+    if recovery:
+        recovery["post_restart_aws_calls"] = sum(aws_faults.calls.values()) - calls_before
+    if journal_dir:
+        journal_dir.cleanup()
+
+    phases = [(canary.get("status") or {}).get("phase") for canary in store.list()]
+    decision_latencies.sort()
+    return {
+        "completed_rollouts": done,
+        "promoted": phases.count("Promoted"),
+        "rolled_back": phases.count("RolledBack"),
+        "simulated_minutes": ticks,
+        "wall_seconds": round(elapsed, 3),
+        "rollouts_per_second": round(done / elapsed, 2) if elapsed else None,
+        "aws_calls_per_rollout": round(sum(aws_faults.calls.values()) / max(done, 1), 3),
+        "apiserver_calls_per_rollout": round(sum(kube_faults.calls.values()) / max(done, 1), 3),
+        "aws_calls": dict(aws_faults.calls),
+        "provisioned_left": sum(lambda_fake.provisioned() for lambda_fake in lambda_fakes),
+        **recovery,
+        "apiserver_calls": dict(kube_faults.calls),
+        "decision_latency_p50_ms": round(decision_latencies[len(decision_latencies) // 2] * 1000, 2),
+        "decision_latency_p99_ms": round(decision_latencies[int(len(decision_latencies) * 0.99)] * 1000, 2),
+    }
+
+
+def compare(results, baseline):
+    """
+    Print the relative change of every numeric result against a previous run.
+    """
+    for key, value in results.items():
+        previous = baseline.get(key)
+        if isinstance(value, (int, float)) and isinstance(previous, (int, float)) and previous:
+            print(f"{key}: {previous} -> {value} ({(value - previous) / previous * 100:+.1f}%)", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--canaries", type=int, default=1000)
+    parser.add_argument("--bad-ratio", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--metrics-budget", type=int, default=50)
+    parser.add_argument("--aws-latency", type=float, default=0.0)
+    parser.add_argument("--kube-latency", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--cooldown", type=int, default=0)
+    parser.add_argument("--prewarm-concurrency", type=int, default=0)
+    parser.add_argument("--probe-invocations", type=int, default=0)
+    parser.add_argument("--waves", help="roll out in region waves, e.g. 'us-east-1;eu-west-1,ap-southeast-1'")
+    parser.add_argument("--journal", action="store_true")
+    parser.add_argument("--restart-at", type=int, default=0)
+    parser.add_argument("--max-ticks", type=int, default=120)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "rollout",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "parameters": vars(args),
+        "results": run(args),
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report["results"], json.load(f)["results"])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+import math
+
+from controller.config import (
+    ANALYSIS_ALPHA,
+    ANALYSIS_BETA,
+    ANALYSIS_ERROR_RATE_DELTA,
+    ANALYSIS_LATENCY_MIN_SAMPLES,
+    ANALYSIS_LATENCY_TOLERANCE,
+    ANALYSIS_MIN_ERROR_RATE,
+)
+
+PROMOTE = 'promote'
+ROLLBACK = 'rollback'
+CONTINUE = 'continue'
+
+
+class ErrorRateSPRT:
+    name = 'error_rate'
+
+    def __init__(self, alpha=ANALYSIS_ALPHA, beta=ANALYSIS_BETA, delta=ANALYSIS_ERROR_RATE_DELTA,
+                 min_error_rate=ANALYSIS_MIN_ERROR_RATE):
+        self._upper = math.log((1 - beta) / alpha)
+        self._lower = math.log(beta / (1 - alpha))
+        self._delta = delta
+        self._min_error_rate = min_error_rate
+
+    def analyze(self, canary, baseline):
+        """
+        Run Wald's sequential probability ratio test on the canary's error count.
+
+        H0 is that the canary fails as often as the baseline, H1 that it fails delta more often.
+        Crossing the upper bound accepts H1 (rollback), crossing the lower bound accepts H0 (promote).
+        The counts must be accumulated since the rollout started; re-running the test on a sliding
+        window would be repeated testing and inflate its error rates.
+        """
+        invocations = canary['invocations']
+        errors = canary['errors']
+        baseline_rate = baseline['errors'] / baseline['invocations'] if baseline['invocations'] else 0
+        p0 = min(max(baseline_rate, self._min_error_rate), 0.5)
+        p1 = min(p0 + self._delta, 0.999)
+        llr = errors * math.log(p1 / p0) + (invocations - errors) * math.log((1 - p1) / (1 - p0))
+        if llr >= self._upper:
+            verdict = ROLLBACK
+        elif llr <= self._lower:
+            verdict = PROMOTE
+        else:
+            verdict = CONTINUE
+        return verdict, {'llr': llr, 'p0': p0, 'p1': p1}
+
+
+class LatencyMannWhitney:
+    name = 'latency'
+
+    def __init__(self, alpha=ANALYSIS_ALPHA, min_samples=ANALYSIS_LATENCY_MIN_SAMPLES,
+                 tolerance=ANALYSIS_LATENCY_TOLERANCE):
+        self._alpha = alpha
+        self._min_samples = min_samples
+        self._tolerance = tolerance
+
+    def analyze(self, canary, baseline):
+        """
+        Test with one-sided Mann-Whitney U tests whether the canary's latency samples are larger than the baseline's,
+        or smaller than the baseline's within the tolerance.
+
+        A significant increase only counts as a regression if the canary's median is also beyond the tolerance.
+        Promotion needs significant evidence that the canary is within the tolerance; without evidence
+        either way the rollout continues.
+        """
+        x = canary['latencies']
+        y = baseline['latencies']
+        if len(x) < self._min_samples or len(y) < self._min_samples:
+            return CONTINUE, {'samples': len(x)}
+        p_value = mann_whitney_greater(x, y)
+        ratio = median(x) / median(y) if median(y) else math.inf
+        if p_value < self._alpha and ratio > self._tolerance:
+            return ROLLBACK, {'p_value': p_value, 'median_ratio': ratio}
+        within_p_value = mann_whitney_greater([latency * self._tolerance for latency in y], x)
+        details = {'p_value': p_value, 'within_p_value': within_p_value, 'median_ratio': ratio}
+        if within_p_value < self._alpha:
+            return PROMOTE, details
+        return CONTINUE, details
+
+
+class CanaryAnalysis:
+    def __init__(self, analyzers=None):
+        self._analyzers = analyzers if analyzers is not None else [ErrorRateSPRT(), LatencyMannWhitney()]
+
+    def analyze(self, canary, baseline):
+        """
+        Compare canary and baseline samples with every analyzer and combine their verdicts.
+
+        Samples are dicts with 'invocations', 'errors' and a 'latencies' list. Any rollback wins,
+        promotion needs every analyzer to agree, anything else means the rollout continues.
+        """
+        verdicts = {}
+        details = {}
+        for analyzer in self._analyzers:
+            verdicts[analyzer.name], details[analyzer.name] = analyzer.analyze(canary, baseline)
+        if ROLLBACK in verdicts.values():
+            verdict = ROLLBACK
+        elif all(value == PROMOTE for value in verdicts.values()):
+            verdict = PROMOTE
+        else:
+            verdict = CONTINUE
+        return verdict, details
+
+
+def median(values):
+    """
+    Get the median of a list of numbers.
+    """
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def mann_whitney_greater(x, y):
+    """
+    Get the one-sided p-value that samples x tend to be larger than samples y.
+
+    Uses the normal approximation with tie and continuity corrections.
+    """
+    n1 = len(x)
+    n2 = len(y)
+    combined = sorted([(value, 0) for value in x] + [(value, 1) for value in y])
+    rank_sum = 0
+    tie_term = 0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        ties = j - i + 1
+        rank = (i + j) / 2 + 1
+        rank_sum += rank * sum(1 for k in range(i, j + 1) if combined[k][1] == 0)
+        tie_term += ties ** 3 - ties
+        i = j + 1
+    n = n1 + n2
+    u = rank_sum - n1 * (n1 + 1) / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
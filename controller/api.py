@@ -1,79 +1,133 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from werkzeug.exceptions import BadRequest
-from kubernetes import client, config
-import logging
 import os
 
-from controller import (
-    get_canary_status,
-    create_canary_deployment,
-    delete_canary_deployment,
-    list_canary_deployments,
-    update_canary_deployment,
-)
+from controller.auth import READ_ROLES, WRITE_ROLES, requires_roles
+from controller.bulk import get_canary_name, run_bulk, validate_canary_name, validate_operations
+from controller.context import get_context
+from controller.events import format_ndjson, format_sse, iter_events, parse_event_id
+from controller.health_check import health_check_bp
+from controller.kubernetes import create_canary_deployment, delete_canary_deployment, update_canary_deployment
+from controller.listing import etag_matches, iter_list, list_etag, list_page, parse_list_query
+from controller.spec import CanarySpec, merge_spec, validate_spec, validate_update
+from controller.telemetry import instrument_views, telemetry_bp
 
 app = Flask(__name__)
+app.register_blueprint(health_check_bp)
+app.register_blueprint(telemetry_bp)
 
-config.load_incluster_config()
-extensions_v1_beta1 = client.ExtensionsV1beta1Api()
-custom_api = client.CustomObjectsApi()
+context = get_context()
 
 @app.route('/canary/<name>', methods=['GET'])
+@requires_roles(READ_ROLES)
 def get_canary(name):
     """
     Get the status of a canary deployment.
     """
-    status = get_canary_status(name)
+    status = context.informer.store.get(name)
     if not status:
         raise BadRequest(f"No canary deployment found with name {name}")
     return jsonify(status)
 
 @app.route('/canary/all', methods=['GET'])
+@requires_roles(READ_ROLES)
 def list_canaries():
     """
-    List all canary deployments.
+    List canary deployments a page at a time, filtered and projected as requested.
     """
-    return jsonify(list_canary_deployments())
+    try:
+        query = parse_list_query(request.args)
+    except ValueError as e:
+        raise BadRequest(str(e))
+    items, continue_token, resource_version = list_page(context.informer.store, query)
+    etag = list_etag(resource_version, request.args)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return Response(status=304, headers={'ETag': etag})
+    return Response(
+        stream_with_context(iter_list(items, query['fields'], resource_version, continue_token)),
+        mimetype='application/json',
+        headers={'ETag': etag}
+    )
+
+@app.route('/canary/events', methods=['GET'])
+@requires_roles(READ_ROLES)
+def canary_events():
+    """
+    Stream rollout events as Server-Sent Events, or as NDJSON when asked for with format=ndjson.
+    """
+    try:
+        last_event_id = parse_event_id(request.headers.get('Last-Event-ID', request.args.get('lastEventId')))
+    except ValueError as e:
+        raise BadRequest(str(e))
+    ndjson = request.args.get('format') == 'ndjson' or 'application/x-ndjson' in request.headers.get('Accept', '')
+    subscription = context.event_bus.subscribe(last_event_id, request.args.getlist('name'))
+    return Response(
+        iter_events(subscription, format_ndjson if ndjson else format_sse),
+        mimetype='application/x-ndjson' if ndjson else 'text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/canary', methods=['POST'])
+@requires_roles(WRITE_ROLES)
 def create_canary():
     """
     Create a new canary deployment.
     """
-    if not request.json or 'functionName' not in request.json:
-        raise BadRequest("Invalid request")
-    function_name = request.json['functionName']
-    new_version = request.json.get('newVersion', None)
-    old_version = request.json.get('oldVersion', None)
-    policy = request.json.get('policy', None)
-    create_canary_deployment(function_name, new_version, old_version, policy)
+    body = request.get_json(silent=True)
+    errors = validate_spec(body)
+    if not errors and validate_canary_name(get_canary_name(body)):
+        errors = [validate_canary_name(get_canary_name(body))]
+    if errors:
+        return jsonify({'status': 'invalid', 'errors': errors}), 400
+    create_canary_deployment(get_canary_name(body), CanarySpec.from_dict(body).to_dict())
     return jsonify({'status': 'success'})
 
+@app.route('/canary/bulk', methods=['POST'])
+@requires_roles(WRITE_ROLES)
+def bulk_canaries():
+    """
+    Create, update and delete many canary deployments in one request.
+    """
+    if not request.json:
+        raise BadRequest("Invalid request")
+    operations = request.json.get('operations')
+    errors = validate_operations(operations, context.informer.store)
+    if any(errors):
+        return jsonify({'status': 'invalid', 'errors': errors}), 400
+    results = run_bulk(context.custom_api, context.informer.store, operations, bool(request.json.get('atomic', False)))
+    failed = any(result['status'] != 'success' for result in results)
+    return jsonify({'status': 'failed' if failed else 'success', 'results': results})
+
 @app.route('/canary/<name>', methods=['PUT'])
+@requires_roles(WRITE_ROLES)
 def update_canary(name):
     """
     Update an existing canary deployment.
     """
-    status = get_canary_status(name)
+    status = context.informer.store.get(name)
     if not status:
         raise BadRequest(f"No canary deployment found with name {name}")
-    function_name = request.json.get('functionName', status['functionName'])
-    new_version = request.json.get('newVersion', status['newVersion'])
-    old_version = request.json.get('oldVersion', status['oldVersion'])
-    policy = request.json.get('policy', status['policy'])
-    update_canary_deployment(name, function_name, new_version, old_version, policy)
+    body = request.get_json(silent=True)
+    errors = validate_update(status, body)
+    if errors:
+        return jsonify({'status': 'invalid', 'errors': errors}), 400
+    update_canary_deployment(name, CanarySpec.from_dict(merge_spec(status, body)).to_dict())
     return jsonify({'status': 'success'})
 
 @app.route('/canary/<name>', methods=['DELETE'])
+@requires_roles(WRITE_ROLES)
 def delete_canary(name):
     """
     Delete a canary deployment.
     """
-    status = get_canary_status(name)
+    status = context.informer.store.get(name)
     if not status:
         raise BadRequest(f"No canary deployment found with name {name}")
-    delete_canary_deployment(name, status['functionName'], status['newVersion'], status['oldVersion'])
+    delete_canary_deployment(name)
     return jsonify({'status': 'success'})
 
+instrument_views(app)
+
 if __name__ == '__main__':
+    context.start()
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 8080)))
\ No newline at end of file
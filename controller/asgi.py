@@ -0,0 +1,240 @@
+import asyncio
+import contextlib
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from controller.auth import READ_ROLES, WRITE_ROLES, requires_roles
+from controller.bulk import get_canary_name, run_bulk, validate_canary_name, validate_operations
+from controller.config import ASGI_EXECUTOR_WORKERS, ASGI_REQUEST_TIMEOUT, EVENT_HEARTBEAT_INTERVAL
+from controller.events import format_ndjson, format_sse, keepalive, parse_event_id
+from controller.listing import etag_matches, iter_list, list_etag, list_page, parse_list_query
+from controller.spec import CanarySpec, merge_spec, validate_spec, validate_update
+from controller.telemetry import HTTP_REQUEST_SECONDS, timed
+
+
+class BlockingExecutor:
+    def __init__(self, workers=ASGI_EXECUTOR_WORKERS, timeout=ASGI_REQUEST_TIMEOUT):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='asgi-io')
+        self._timeout = timeout
+
+    async def run(self, func, *args):
+        """
+        Run a blocking Kubernetes or AWS call on the bounded executor, giving up after the request timeout.
+
+        The waiting request is cancelled on timeout; the call itself finishes in the background
+        because threads cannot be interrupted.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, functools.partial(func, *args))
+        try:
+            return await asyncio.wait_for(future, self._timeout)
+        except asyncio.TimeoutError:
+            logging.error(f"Call to '{func.__name__}' timed out after {self._timeout}s.")
+            raise HTTPException(504, f"Timed out after {self._timeout}s")
+
+    def shutdown(self):
+        """
+        Stop accepting new calls and release the executor threads.
+        """
+        self._executor.shutdown(wait=False)
+
+
+async def read_json(request):
+    """
+    Get the JSON body of a request, rejecting bodies that are not JSON objects.
+    """
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(400, "Invalid request")
+    if not isinstance(body, dict):
+        raise HTTPException(400, "Invalid request")
+    return body
+
+
+def create_app(store, create_deployment, update_deployment, delete_deployment, executor=None, custom_api=None,
+               event_bus=None, readiness=None):
+    """
+    Create the ASGI application serving the canary routes from the informer store, alongside the health
+    check and metrics routes of the Flask app.
+
+    The bulk route is only served when a CustomObjectsApi is given, the event stream only when an EventBus is
+    and the readiness route only when a readiness report callable is.
+    """
+    executor = executor or BlockingExecutor()
+
+    def get_status(name):
+        status = store.get(name)
+        if not status:
+            raise HTTPException(400, f"No canary deployment found with name {name}")
+        return status
+
+    @timed(HTTP_REQUEST_SECONDS, 'get_canary')
+    @requires_roles(READ_ROLES)
+    async def get_canary(request):
+        return JSONResponse(get_status(request.path_params['name']))
+
+    @timed(HTTP_REQUEST_SECONDS, 'list_canaries')
+    @requires_roles(READ_ROLES)
+    async def list_canaries(request):
+        try:
+            query = parse_list_query(request.query_params)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        items, continue_token, resource_version = list_page(store, query)
+        etag = list_etag(resource_version, request.query_params)
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            return Response(status_code=304, headers={'ETag': etag})
+        return StreamingResponse(
+            iter_list(items, query['fields'], resource_version, continue_token),
+            media_type='application/json',
+            headers={'ETag': etag}
+        )
+
+    @timed(HTTP_REQUEST_SECONDS, 'canary_events')
+    @requires_roles(READ_ROLES)
+    async def canary_events(request):
+        try:
+            last_event_id = parse_event_id(
+                request.headers.get('last-event-id', request.query_params.get('lastEventId'))
+            )
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        ndjson = (request.query_params.get('format') == 'ndjson'
+                  or 'application/x-ndjson' in request.headers.get('accept', ''))
+        formatter = format_ndjson if ndjson else format_sse
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        subscription = event_bus.subscribe(
+            last_event_id, request.query_params.getlist('name'), lambda: loop.call_soon_threadsafe(ready.set)
+        )
+
+        async def stream():
+            try:
+                while not subscription.closed:
+                    ready.clear()
+                    events = subscription.get(0)
+                    for event in events:
+                        yield formatter(event)
+                    if events:
+                        continue
+                    try:
+                        await asyncio.wait_for(ready.wait(), EVENT_HEARTBEAT_INTERVAL)
+                    except asyncio.TimeoutError:
+                        yield keepalive(formatter)
+            finally:
+                subscription.close()
+
+        return StreamingResponse(
+            stream(),
+            media_type='application/x-ndjson' if ndjson else 'text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
+    @timed(HTTP_REQUEST_SECONDS, 'create_canary')
+    @requires_roles(WRITE_ROLES)
+    async def create_canary(request):
+        body = await read_json(request)
+        errors = validate_spec(body)
+        if not errors and validate_canary_name(get_canary_name(body)):
+            errors = [validate_canary_name(get_canary_name(body))]
+        if errors:
+            return JSONResponse({'status': 'invalid', 'errors': errors}, status_code=400)
+        await executor.run(create_deployment, get_canary_name(body), CanarySpec.from_dict(body).to_dict())
+        return JSONResponse({'status': 'success'})
+
+    @timed(HTTP_REQUEST_SECONDS, 'update_canary')
+    @requires_roles(WRITE_ROLES)
+    async def update_canary(request):
+        name = request.path_params['name']
+        status = get_status(name)
+        body = await read_json(request)
+        errors = validate_update(status, body)
+        if errors:
+            return JSONResponse({'status': 'invalid', 'errors': errors}, status_code=400)
+        await executor.run(update_deployment, name, CanarySpec.from_dict(merge_spec(status, body)).to_dict())
+        return JSONResponse({'status': 'success'})
+
+    @timed(HTTP_REQUEST_SECONDS, 'delete_canary')
+    @requires_roles(WRITE_ROLES)
+    async def delete_canary(request):
+        name = request.path_params['name']
+        get_status(name)
+        await executor.run(delete_deployment, name)
+        return JSONResponse({'status': 'success'})
+
+    @timed(HTTP_REQUEST_SECONDS, 'bulk_canaries')
+    @requires_roles(WRITE_ROLES)
+    async def bulk_canaries(request):
+        body = await read_json(request)
+        operations = body.get('operations')
+        errors = validate_operations(operations, store)
+        if any(errors):
+            return JSONResponse({'status': 'invalid', 'errors': errors}, status_code=400)
+        results = await executor.run(run_bulk, custom_api, store, operations, bool(body.get('atomic', False)))
+        failed = any(result['status'] != 'success' for result in results)
+        return JSONResponse({'status': 'failed' if failed else 'success', 'results': results})
+
+    async def health_check(request):
+        return JSONResponse({'status': 'OK'})
+
+    async def metrics(request):
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+    async def ready(request):
+        report = readiness()
+        return JSONResponse(report, status_code=200 if report['ready'] else 503)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        try:
+            yield
+        finally:
+            executor.shutdown()
+
+    routes = [
+        Route('/health_check', health_check, methods=['GET']),
+        Route('/metrics', metrics, methods=['GET']),
+        Route('/canary/all', list_canaries, methods=['GET']),
+        Route('/canary', create_canary, methods=['POST']),
+        Route('/canary/{name}', get_canary, methods=['GET']),
+        Route('/canary/{name}', update_canary, methods=['PUT']),
+        Route('/canary/{name}', delete_canary, methods=['DELETE']),
+    ]
+    if custom_api is not None:
+        routes.insert(1, Route('/canary/bulk', bulk_canaries, methods=['POST']))
+    if event_bus is not None:
+        routes.insert(1, Route('/canary/events', canary_events, methods=['GET']))
+    if readiness is not None:
+        routes.insert(0, Route('/ready', ready, methods=['GET']))
+    return Starlette(routes=routes, lifespan=lifespan)
+
+
+def build_app():
+    """
+    Create the ASGI application on top of the controller's informer and Kubernetes helpers.
+    """
+    from controller import api
+    api.context.start()
+    return create_app(
+        api.context.informer.store,
+        api.create_canary_deployment,
+        api.update_canary_deployment,
+        api.delete_canary_deployment,
+        custom_api=api.context.custom_api,
+        event_bus=api.context.event_bus,
+        readiness=api.context.readiness
+    )
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(build_app(), host='0.0.0.0', port=int(os.environ.get('PORT', 8080)))
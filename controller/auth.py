@@ -1,14 +1,79 @@
+from collections import OrderedDict
 from flask import request
+from werkzeug.exceptions import Forbidden, Unauthorized
+import asyncio
+import functools
+import hashlib
 import logging
-import jwt
+import threading
+import time
 
-from config import JWT_SECRET
+from controller.config import AUTH_CACHE_SIZE, AUTH_CACHE_TTL, AUTH_READ_ROLES, AUTH_WRITE_ROLES, JWT_SECRET
+from controller.telemetry import AUTH_CACHE_LOOKUPS, AUTH_DECODE_SECONDS
+
+READ_ROLES = frozenset(role.strip() for role in AUTH_READ_ROLES.split(',') if role.strip())
+WRITE_ROLES = frozenset(role.strip() for role in AUTH_WRITE_ROLES.split(',') if role.strip())
+
+_cache_hits = AUTH_CACHE_LOOKUPS.labels('hit')
+_cache_misses = AUTH_CACHE_LOOKUPS.labels('miss')
+
+
+class TokenCache:
+    def __init__(self, max_size=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._max_size = max_size
+        self._ttl = ttl
+
+    def get(self, token):
+        """
+        Get the verified claims and role set of a token, or None if the token is not cached or has expired.
+        """
+        key = hashlib.sha256(token.encode('utf-8')).digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def put(self, token, claims, roles):
+        """
+        Cache the verified claims of a token until its exp claim, or for the cache TTL if that comes first.
+        """
+        key = hashlib.sha256(token.encode('utf-8')).digest()
+        expires_at = time.time() + self._ttl
+        if 'exp' in claims:
+            expires_at = min(expires_at, claims['exp'])
+        with self._lock:
+            self._entries[key] = (expires_at, claims, roles)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop all cached tokens.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
 
 def get_token():
     """
     Get the token from the authorization header.
     """
-    auth_header = request.headers.get('Authorization')
+    return parse_authorization(request.headers.get('Authorization'))
+
+def parse_authorization(auth_header):
+    """
+    Get the bearer token from the value of an authorization header.
+    """
     if not auth_header or not auth_header.startswith('Bearer '):
         return None
     return auth_header[7:]
@@ -17,6 +82,8 @@ def decode_token(token):
     """
     Decode the token using the JWT_SECRET.
     """
+    import jwt
+    started = time.perf_counter()
     try:
         decoded = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
         return decoded
@@ -26,16 +93,64 @@ def decode_token(token):
     except jwt.InvalidTokenError:
         logging.error("Invalid JWT token")
         return None
+    finally:
+        AUTH_DECODE_SECONDS.observe(time.perf_counter() - started)
 
-def is_authorized(token, required_roles):
+def get_roles(token):
     """
-    Check if the user is authorized to perform the requested action.
+    Get the role set of a token, verifying it only if it is not cached yet.
     """
+    cached = token_cache.get(token)
+    if cached is not None:
+        _cache_hits.inc()
+        return cached[1]
+    _cache_misses.inc()
     decoded = decode_token(token)
     if not decoded:
+        return None
+    roles = decoded.get('roles') or []
+    roles = frozenset([roles] if isinstance(roles, str) else roles)
+    token_cache.put(token, decoded, roles)
+    return roles
+
+def is_authorized(token, required_roles):
+    """
+    Check if the user is authorized to perform the requested action.
+    """
+    if not token:
+        return False
+    roles = get_roles(token)
+    if not roles:
         return False
-    user_roles = decoded.get('roles', [])
-    for role in required_roles:
-        if role in user_roles:
-            return True
-    return False
\ No newline at end of file
+    return not roles.isdisjoint(required_roles)
+
+def requires_roles(required_roles):
+    """
+    Decorate a Flask view or an ASGI endpoint so that it requires a bearer token with one of the roles.
+    """
+    required_roles = frozenset(required_roles)
+
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            from starlette.exceptions import HTTPException
+
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                token = parse_authorization(request.headers.get('Authorization'))
+                if not token:
+                    raise HTTPException(401, "Missing bearer token")
+                if not is_authorized(token, required_roles):
+                    raise HTTPException(403, "Not authorized")
+                return await view(request, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            token = get_token()
+            if not token:
+                raise Unauthorized("Missing bearer token")
+            if not is_authorized(token, required_roles):
+                raise Forbidden("Not authorized")
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
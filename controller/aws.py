@@ -0,0 +1,126 @@
+import logging
+import threading
+
+from controller.config import (
+    AWS_CONNECT_TIMEOUT,
+    AWS_MAX_ATTEMPTS,
+    AWS_MAX_POOL_CONNECTIONS,
+    AWS_READ_TIMEOUT,
+    AWS_ROLE_ARN,
+)
+from controller.telemetry import AWS_POOL_IN_USE, AWS_POOL_SATURATION
+
+
+class ClientFactory:
+    def __init__(self, max_pool_connections=AWS_MAX_POOL_CONNECTIONS, connect_timeout=AWS_CONNECT_TIMEOUT,
+                 read_timeout=AWS_READ_TIMEOUT, max_attempts=AWS_MAX_ATTEMPTS):
+        from botocore.config import Config
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._sessions = {}
+        self._max_pool_connections = max_pool_connections
+        self.requests = 0
+        self._config = Config(
+            max_pool_connections=max_pool_connections,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            retries={
+                "mode": "adaptive",
+                "max_attempts": max_attempts
+            }
+        )
+
+    def client(self, service_name, region_name, role_arn=AWS_ROLE_ARN):
+        """
+        Get the shared client of an AWS service for a region and optional IAM role, creating it on first use.
+        """
+        key = (service_name, region_name, role_arn)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._session(role_arn).client(service_name, region_name=region_name, config=self._config)
+                self._track_pool(client, service_name, region_name)
+                self._clients[key] = client
+                logging.info(f"Created {service_name} client for '{region_name}'.")
+            return client
+
+    def _session(self, role_arn):
+        session = self._sessions.get(role_arn)
+        if session is not None:
+            return session
+        import boto3
+        if role_arn is None:
+            session = boto3.session.Session()
+        else:
+            from botocore.credentials import CredentialResolver
+            from botocore.session import Session
+            botocore_session = Session()
+            botocore_session.register_component(
+                "credential_provider", CredentialResolver([AssumeRoleProvider(lambda: self._assume_role(role_arn))])
+            )
+            session = boto3.session.Session(botocore_session=botocore_session)
+        self._sessions[role_arn] = session
+        return session
+
+    def _assume_role(self, role_arn):
+        import boto3
+        response = boto3.client("sts", config=self._config).assume_role(
+            RoleArn=role_arn,
+            RoleSessionName="lambda-canary-controller"
+        )
+        credentials = response["Credentials"]
+        logging.info(f"Assumed role '{role_arn}' until {credentials['Expiration'].isoformat()}.")
+        return {
+            "access_key": credentials["AccessKeyId"],
+            "secret_key": credentials["SecretAccessKey"],
+            "token": credentials["SessionToken"],
+            "expiry_time": credentials["Expiration"].isoformat()
+        }
+
+    def _track_pool(self, client, service_name, region_name):
+        in_use = AWS_POOL_IN_USE.labels(service_name, region_name)
+        saturation = AWS_POOL_SATURATION.labels(service_name, region_name)
+        lock = threading.Lock()
+        state = {"in_use": 0}
+
+        def update(delta):
+            with lock:
+                state["in_use"] += delta
+                if delta > 0:
+                    self.requests += 1
+                in_use.set(state["in_use"])
+                saturation.set(state["in_use"] / self._max_pool_connections)
+
+        client.meta.events.register("before-send", lambda **kwargs: update(1))
+        client.meta.events.register("response-received", lambda **kwargs: update(-1))
+
+
+class AssumeRoleProvider:
+    METHOD = "sts-assume-role"
+
+    def __init__(self, assume_role):
+        self._assume_role = assume_role
+
+    def load(self):
+        """
+        Get credentials that assume the role on first use and refresh before they expire.
+
+        Nothing is fetched here, so creating a session or client never waits for STS.
+        """
+        from botocore.credentials import DeferredRefreshableCredentials
+        return DeferredRefreshableCredentials(refresh_using=self._assume_role, method=self.METHOD)
+
+
+_default_factory = None
+_default_factory_lock = threading.Lock()
+
+
+def get_client_factory():
+    """
+    Get the client factory shared by all controller components.
+    """
+    global _default_factory
+    with _default_factory_lock:
+        if _default_factory is None:
+            _default_factory = ClientFactory()
+        return _default_factory
@@ -0,0 +1,183 @@
+import copy
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from controller.config import BULK_CONCURRENCY, BULK_MAX_OPERATIONS, CRD_GROUP, CRD_PLURAL, CRD_VERSION, NAMESPACE
+from controller.spec import validate_spec, validate_update
+from controller.telemetry import KUBERNETES_CALL_SECONDS, timed
+
+NAME_PATTERN = re.compile(r'^[a-z0-9]([-a-z0-9]*[a-z0-9])?$')
+REQUIRED_SPEC_FIELDS = ('functionName', 'newVersion', 'oldVersion', 'policy')
+SPEC_FIELDS = REQUIRED_SPEC_FIELDS + ('alias', 'regions', 'waves')
+
+
+def get_canary_name(body):
+    """
+    Get the name of the LambdaCanary object a create request makes: its 'name', or else its function name
+    turned into a valid object name.
+    """
+    if 'name' in body:
+        return body['name']
+    return re.sub(r'[^a-z0-9-]+', '-', body['functionName'].lower()).strip('-')
+
+
+def validate_canary_name(name):
+    """
+    Check that a canary name is a valid Kubernetes object name. Returns an error message or None.
+    """
+    if not isinstance(name, str) or not NAME_PATTERN.match(name):
+        return f"Invalid canary name '{name}'"
+    return None
+
+
+@timed(KUBERNETES_CALL_SECONDS, 'create_lambdacanary')
+def create_canary_object(custom_api, body, namespace=NAMESPACE):
+    """
+    Create a LambdaCanary object.
+    """
+    return custom_api.create_namespaced_custom_object(CRD_GROUP, CRD_VERSION, namespace, CRD_PLURAL, body)
+
+
+@timed(KUBERNETES_CALL_SECONDS, 'patch_lambdacanary')
+def patch_canary_object(custom_api, name, patch, namespace=NAMESPACE):
+    """
+    Merge-patch the fields of a LambdaCanary object.
+    """
+    return custom_api.patch_namespaced_custom_object(CRD_GROUP, CRD_VERSION, namespace, CRD_PLURAL, name, patch)
+
+
+@timed(KUBERNETES_CALL_SECONDS, 'delete_lambdacanary')
+def delete_canary_object(custom_api, name, namespace=NAMESPACE):
+    """
+    Delete a LambdaCanary object.
+    """
+    return custom_api.delete_namespaced_custom_object(CRD_GROUP, CRD_VERSION, namespace, CRD_PLURAL, name)
+
+
+def validate_operations(operations, store):
+    """
+    Check every operation of a bulk request, including the spec it creates or updates to, before anything
+    is written.
+
+    Returns a list with an error message, or None, for each operation.
+    """
+    if not isinstance(operations, list) or not operations:
+        return ["'operations' must be a non-empty list"]
+    if len(operations) > BULK_MAX_OPERATIONS:
+        return [f"At most {BULK_MAX_OPERATIONS} operations are allowed per request"]
+    errors = []
+    seen = set()
+    for operation in operations:
+        if not isinstance(operation, dict):
+            errors.append("Operation must be an object")
+            continue
+        op = operation.get('op')
+        name = operation.get('name')
+        if op not in ('create', 'update', 'delete'):
+            errors.append(f"Unknown operation '{op}'")
+        elif validate_canary_name(name):
+            errors.append(validate_canary_name(name))
+        elif name in seen:
+            errors.append(f"Canary '{name}' appears more than once")
+        elif op == 'create' and store.get(name):
+            errors.append(f"Canary deployment '{name}' already exists")
+        elif op == 'create' and not all(operation.get(field) for field in REQUIRED_SPEC_FIELDS):
+            errors.append(f"Create requires {', '.join(REQUIRED_SPEC_FIELDS)}")
+        elif op != 'create' and not store.get(name):
+            errors.append(f"No canary deployment found with name {name}")
+        else:
+            spec_errors = _validate(operation, store.get(name))
+            errors.append('; '.join(spec_errors) if spec_errors else None)
+        seen.add(name)
+    return errors
+
+
+def run_bulk(custom_api, store, operations, atomic=False, concurrency=BULK_CONCURRENCY):
+    """
+    Apply validated create, update and delete operations with bounded concurrency.
+
+    In atomic mode a failure undoes every operation that succeeded. Returns one result per operation.
+    """
+    previous = {operation['name']: copy.deepcopy(store.get(operation['name'])) for operation in operations}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda operation: _apply(custom_api, operation), operations))
+    if atomic and any(result['status'] == 'error' for result in results):
+        undo = [(operation, result) for operation, result in zip(operations, results) if result['status'] == 'success']
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lambda item: _undo(custom_api, item[0], item[1], previous), undo))
+    return results
+
+
+def _apply(custom_api, operation):
+    from kubernetes import client
+    name = operation['name']
+    result = {'op': operation['op'], 'name': name}
+    try:
+        if operation['op'] == 'create':
+            body = {field: operation[field] for field in SPEC_FIELDS if field in operation}
+            body.update({
+                'apiVersion': f'{CRD_GROUP}/{CRD_VERSION}',
+                'kind': 'LambdaCanary',
+                'metadata': {'name': name}
+            })
+            create_canary_object(custom_api, body)
+        elif operation['op'] == 'update':
+            patch = {field: operation[field] for field in SPEC_FIELDS if field in operation}
+            if patch:
+                patch_canary_object(custom_api, name, patch)
+        else:
+            delete_canary_object(custom_api, name)
+        result['status'] = 'success'
+    except client.rest.ApiException as e:
+        logging.error(f"Bulk {operation['op']} of '{name}' failed: {e.reason}.")
+        result.update({'status': 'error', 'error': e.reason})
+    except Exception as e:
+        logging.error(f"Bulk {operation['op']} of '{name}' failed: {e}.")
+        result.update({'status': 'error', 'error': str(e)})
+    return result
+
+
+def _undo(custom_api, operation, result, previous):
+    from kubernetes import client
+    name = operation['name']
+    try:
+        if operation['op'] == 'create':
+            delete_canary_object(custom_api, name)
+        elif operation['op'] == 'update':
+            patch_canary_object(custom_api, name, _restore_patch(
+                {field: previous[name].get(field) for field in SPEC_FIELDS},
+                {field: operation[field] for field in SPEC_FIELDS if field in operation}
+            ))
+        else:
+            body = {key: value for key, value in previous[name].items() if key != 'status'}
+            body['metadata'] = {
+                key: previous[name]['metadata'][key]
+                for key in ('name', 'labels', 'annotations') if key in previous[name]['metadata']
+            }
+            create_canary_object(custom_api, body)
+        result['status'] = 'rolled_back'
+    except client.rest.ApiException as e:
+        logging.error(f"Could not roll back bulk {operation['op']} of '{name}': {e.reason}.")
+        result.update({'status': 'rollback_failed', 'error': e.reason})
+    except Exception as e:
+        logging.error(f"Could not roll back bulk {operation['op']} of '{name}': {e}.")
+        result.update({'status': 'rollback_failed', 'error': str(e)})
+
+
+def _restore_patch(previous, update):
+    patch = dict(previous)
+    for key, value in update.items():
+        if key not in previous:
+            patch[key] = None
+        elif isinstance(previous[key], dict) and isinstance(value, dict):
+            patch[key] = _restore_patch(previous[key], value)
+    return patch
+
+
+def _validate(operation, current):
+    if operation['op'] == 'delete':
+        return []
+    if operation['op'] == 'create':
+        return validate_spec(operation)
+    return validate_update(current, {field: operation[field] for field in SPEC_FIELDS if field in operation})
@@ -1,3 +1,89 @@
 import os
+import socket
 
-JWT_SECRET = os.environ.get('JWT_SECRET', 'mysecretkey')
\ No newline at end of file
+JWT_SECRET = os.environ.get('JWT_SECRET', 'mysecretkey')
+
+NAMESPACE = os.environ.get('NAMESPACE', 'default')
+
+CRD_GROUP = 'awesomeapp.com'
+CRD_VERSION = 'v1'
+CRD_PLURAL = 'lambdacanaries'
+
+INFORMER_WATCH_TIMEOUT = int(os.environ.get('INFORMER_WATCH_TIMEOUT', 300))
+INFORMER_SYNC_TIMEOUT = int(os.environ.get('INFORMER_SYNC_TIMEOUT', 30))
+INFORMER_LIST_PAGE_SIZE = int(os.environ.get('INFORMER_LIST_PAGE_SIZE', 500))
+
+AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+
+RECONCILE_WORKERS = int(os.environ.get('RECONCILE_WORKERS', 8))
+RECONCILE_QUEUE_DEPTH = int(os.environ.get('RECONCILE_QUEUE_DEPTH', 1000))
+RECONCILE_QPS = float(os.environ.get('RECONCILE_QPS', 20))
+RECONCILE_BURST = int(os.environ.get('RECONCILE_BURST', 50))
+
+EVALUATION_INTERVAL = int(os.environ.get('EVALUATION_INTERVAL', 60))
+EVALUATION_WINDOW_MINUTES = int(os.environ.get('EVALUATION_WINDOW_MINUTES', 5))
+SCHEDULER_SLACK = float(os.environ.get('SCHEDULER_SLACK', 5))
+METRICS_CALLS_PER_TICK = int(os.environ.get('METRICS_CALLS_PER_TICK', 10))
+
+AWS_ROLE_ARN = os.environ.get('AWS_ROLE_ARN')
+AWS_MAX_POOL_CONNECTIONS = int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', 50))
+AWS_CONNECT_TIMEOUT = float(os.environ.get('AWS_CONNECT_TIMEOUT', 5))
+AWS_READ_TIMEOUT = float(os.environ.get('AWS_READ_TIMEOUT', 30))
+AWS_MAX_ATTEMPTS = int(os.environ.get('AWS_MAX_ATTEMPTS', 5))
+
+ASGI_EXECUTOR_WORKERS = int(os.environ.get('ASGI_EXECUTOR_WORKERS', 32))
+ASGI_REQUEST_TIMEOUT = float(os.environ.get('ASGI_REQUEST_TIMEOUT', 10))
+
+AUTH_CACHE_SIZE = int(os.environ.get('AUTH_CACHE_SIZE', 4096))
+AUTH_CACHE_TTL = int(os.environ.get('AUTH_CACHE_TTL', 300))
+AUTH_READ_ROLES = os.environ.get('AUTH_READ_ROLES', 'reader,deployer,admin')
+AUTH_WRITE_ROLES = os.environ.get('AUTH_WRITE_ROLES', 'deployer,admin')
+
+BULK_CONCURRENCY = int(os.environ.get('BULK_CONCURRENCY', 8))
+BULK_MAX_OPERATIONS = int(os.environ.get('BULK_MAX_OPERATIONS', 200))
+
+STATUS_FLUSH_INTERVAL = float(os.environ.get('STATUS_FLUSH_INTERVAL', 5))
+
+POD_NAME = os.environ.get('POD_NAME', socket.gethostname())
+SHARD_LEASE_DURATION = int(os.environ.get('SHARD_LEASE_DURATION', 15))
+SHARD_RENEW_INTERVAL = float(os.environ.get('SHARD_RENEW_INTERVAL', 5))
+SHARD_VIRTUAL_NODES = int(os.environ.get('SHARD_VIRTUAL_NODES', 64))
+
+LAMBDA_ALIAS_TTL = float(os.environ.get('LAMBDA_ALIAS_TTL', 30))
+
+PREWARM_HEADROOM = float(os.environ.get('PREWARM_HEADROOM', 1.2))
+PREWARM_POLL_INTERVAL = float(os.environ.get('PREWARM_POLL_INTERVAL', 15))
+PREWARM_TIMEOUT = float(os.environ.get('PREWARM_TIMEOUT', 600))
+PREWARM_CONCURRENCY = int(os.environ.get('PREWARM_CONCURRENCY', 16))
+
+PROBE_INVOCATIONS = int(os.environ.get('PROBE_INVOCATIONS', 100))
+PROBE_CONCURRENCY = int(os.environ.get('PROBE_CONCURRENCY', 16))
+PROBE_RATE = float(os.environ.get('PROBE_RATE', 50))
+PROBE_MAX_LATENCY_RATIO = float(os.environ.get('PROBE_MAX_LATENCY_RATIO', 1.5))
+PROBE_MAX_ERROR_RATE_DELTA = float(os.environ.get('PROBE_MAX_ERROR_RATE_DELTA', 0.01))
+
+ANALYSIS_WINDOW_MINUTES = int(os.environ.get('ANALYSIS_WINDOW_MINUTES', 30))
+METRIC_WINDOW_MINUTES = int(os.environ.get('METRIC_WINDOW_MINUTES', max(60, 2 * ANALYSIS_WINDOW_MINUTES)))
+ANALYSIS_ALPHA = float(os.environ.get('ANALYSIS_ALPHA', 0.05))
+ANALYSIS_BETA = float(os.environ.get('ANALYSIS_BETA', 0.2))
+ANALYSIS_ERROR_RATE_DELTA = float(os.environ.get('ANALYSIS_ERROR_RATE_DELTA', 0.01))
+ANALYSIS_MIN_ERROR_RATE = float(os.environ.get('ANALYSIS_MIN_ERROR_RATE', 0.001))
+ANALYSIS_LATENCY_MIN_SAMPLES = int(os.environ.get('ANALYSIS_LATENCY_MIN_SAMPLES', 10))
+ANALYSIS_LATENCY_TOLERANCE = float(os.environ.get('ANALYSIS_LATENCY_TOLERANCE', 1.1))
+ANALYSIS_SETTLE_MINUTES = int(os.environ.get('ANALYSIS_SETTLE_MINUTES', 3))
+ROLLBACK_MIN_INVOCATIONS = int(os.environ.get('ROLLBACK_MIN_INVOCATIONS', 200))
+
+BOOTSTRAP_MODE = os.environ.get('BOOTSTRAP_MODE', 'auto')
+
+LIST_DEFAULT_LIMIT = int(os.environ.get('LIST_DEFAULT_LIMIT', 100))
+LIST_MAX_LIMIT = int(os.environ.get('LIST_MAX_LIMIT', 1000))
+
+EVENT_HISTORY = int(os.environ.get('EVENT_HISTORY', 1000))
+EVENT_BUFFER_SIZE = int(os.environ.get('EVENT_BUFFER_SIZE', 256))
+EVENT_HEARTBEAT_INTERVAL = float(os.environ.get('EVENT_HEARTBEAT_INTERVAL', 15))
+
+JOURNAL_PATH = os.environ.get('JOURNAL_PATH', '/var/lib/lambda-canary/rollouts.journal')
+JOURNAL_FSYNC = os.environ.get('JOURNAL_FSYNC', 'false').lower() == 'true'
+JOURNAL_COMPACT_RATIO = float(os.environ.get('JOURNAL_COMPACT_RATIO', 4))
+
+REGION_CONCURRENCY = int(os.environ.get('REGION_CONCURRENCY', 8))
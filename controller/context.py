@@ -0,0 +1,262 @@
+import atexit
+import importlib
+import logging
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from controller.config import (
+    AWS_REGION,
+    BOOTSTRAP_MODE,
+    CRD_GROUP,
+    CRD_PLURAL,
+    INFORMER_SYNC_TIMEOUT,
+    JOURNAL_PATH,
+    METRICS_CALLS_PER_TICK,
+    NAMESPACE,
+)
+from controller.telemetry import STARTUP_SECONDS
+
+
+class ControllerContext:
+    def __init__(self, namespace=NAMESPACE, bootstrap_mode=BOOTSTRAP_MODE):
+        self._lock = threading.RLock()
+        self._namespace = namespace
+        self._bootstrap_mode = bootstrap_mode
+        self._components = {}
+        self._steps = {}
+        self._created = time.monotonic()
+        self._ready = None
+        self._started = set()
+        self._bootstrapped = None
+        self._aws_requests = None
+
+    def kubernetes_api(self, api_name):
+        """
+        Get a shared Kubernetes API object such as 'CustomObjectsApi', loading the cluster configuration on first use.
+        """
+        def create():
+            self._get('kube_config', self._load_kube_config)
+            from kubernetes import client
+            return getattr(client, api_name)()
+        return self._get(api_name, create)
+
+    @property
+    def custom_api(self):
+        return self.kubernetes_api('CustomObjectsApi')
+
+    @property
+    def event_bus(self):
+        def create():
+            from controller.events import EventBus
+            return EventBus()
+        return self._get('event_bus', create)
+
+    @property
+    def informer(self):
+        def create():
+            from controller.events import StatusEventFeed
+            from controller.informer import CanaryInformer
+            informer = CanaryInformer(self.custom_api, self._namespace)
+            informer.add_handler(StatusEventFeed(self.event_bus).on_event)
+            return informer
+        return self._get('informer', create)
+
+    @property
+    def shard_coordinator(self):
+        def create():
+            self._get('kube_config', self._load_kube_config)
+            from controller.sharding import ShardCoordinator
+            return ShardCoordinator(namespace=self._namespace)
+        return self._get('shard_coordinator', create)
+
+    @property
+    def status_writer(self):
+        def create():
+            from controller.status import StatusWriter
+            return StatusWriter(self.custom_api, self.informer.store, namespace=self._namespace)
+        return self._get('status_writer', create)
+
+    @property
+    def lambda_client(self):
+        def create():
+            return importlib.import_module('controller.lambda').LambdaClient(AWS_REGION)
+        return self._get('lambda_client', create)
+
+    @property
+    def reconciler(self):
+        def create():
+            from controller.journal import RolloutJournal
+            from controller.metrics import BatchMetricsFetcher
+            from controller.reconciler import CanaryReconciler
+            from controller.window import MetricWindowStore
+            return CanaryReconciler(
+                self.informer,
+                self.lambda_client,
+                BatchMetricsFetcher(AWS_REGION, METRICS_CALLS_PER_TICK),
+                MetricWindowStore(),
+                self.status_writer,
+                self.shard_coordinator,
+                journal=RolloutJournal() if JOURNAL_PATH else None
+            )
+        return self._get('reconciler', create)
+
+    def start(self, sync_timeout=INFORMER_SYNC_TIMEOUT):
+        """
+        Bootstrap the cluster resources if needed, then start the informer, the shard coordinator,
+        the status writer and the reconciler.
+
+        Calling start again is a no-op, so every entry point can call it. A start that fails is retried
+        by the next call, skipping the steps that already succeeded.
+        """
+        with self._lock:
+            if self._ready is not None:
+                return
+            self._ready = threading.Event()
+        try:
+            self._start(sync_timeout)
+        except Exception:
+            with self._lock:
+                self._ready = None
+            raise
+        self._ready.set()
+        logging.info(f"Controller started in {self._steps['total']:.3f}s.")
+
+    def bootstrap(self):
+        """
+        Create the custom resource definition, service account and cluster role side by side.
+
+        In 'auto' mode the steps are skipped when the custom resource definition already exists,
+        'always' runs them on every start and 'never' leaves them to the deployment tooling.
+        """
+        if not self._needs_bootstrap():
+            self._bootstrapped = False
+            logging.info("Skipping bootstrap, LambdaCanary resources already exist.")
+            return
+        from controller import kubernetes
+        steps = [
+            (kubernetes.create_custom_resource_definition, ()),
+            (kubernetes.create_service_account, (self._namespace,)),
+            (kubernetes.create_cluster_role, (self._namespace,)),
+        ]
+        with ThreadPoolExecutor(max_workers=len(steps), thread_name_prefix='bootstrap') as executor:
+            futures = [executor.submit(step, *args) for step, args in steps]
+        for future in futures:
+            future.result()
+        self._bootstrapped = True
+
+    def readiness(self):
+        """
+        Report whether the controller is ready to serve and how long each startup step took.
+        """
+        ready = self._ready is not None and self._ready.is_set()
+        informer = self._components.get('informer')
+        reconciler = self._components.get('reconciler')
+        return {
+            'ready': ready,
+            'synced': bool(informer and informer.has_synced()),
+            'bootstrapped': self._bootstrapped,
+            'uptimeSeconds': round(time.monotonic() - self._created, 3),
+            'startupSeconds': round(self._steps['total'], 3) if ready else None,
+            'steps': {name: round(seconds, 3) for name, seconds in self._steps.items() if name != 'total'},
+            'recovery': reconciler.recovery if reconciler else None,
+            'startupAwsRequests': self._aws_requests,
+        }
+
+    def _start(self, sync_timeout):
+        self._once('bootstrap', self.bootstrap)
+        self._once('informer_start', self.informer.start)
+        if self._once('shard_start', self.shard_coordinator.start):
+            atexit.register(self.shard_coordinator.stop)
+            self._handle_sigterm()
+        self._once('status_writer_start', self.status_writer.start)
+        if not self._time('informer_sync', self.informer.wait_for_sync, sync_timeout):
+            logging.warning("LambdaCanary informer has not synced yet, serving from a partial store.")
+        self._once('reconciler_start', self.reconciler.start)
+        self._aws_requests = self._count_aws_requests()
+        self._steps['total'] = time.monotonic() - self._created
+        STARTUP_SECONDS.labels('total').set(self._steps['total'])
+
+    def _once(self, step, func):
+        if step in self._started:
+            return False
+        self._time(step, func)
+        self._started.add(step)
+        return True
+
+    def _handle_sigterm(self):
+        if threading.current_thread() is not threading.main_thread():
+            return
+        previous = signal.getsignal(signal.SIGTERM)
+
+        def handler(signum, frame):
+            logging.info("Received SIGTERM, releasing the shard lease.")
+            self.shard_coordinator.stop()
+            if callable(previous):
+                previous(signum, frame)
+            else:
+                raise SystemExit(128 + signum)
+        signal.signal(signal.SIGTERM, handler)
+
+    def _needs_bootstrap(self):
+        if self._bootstrap_mode == 'never':
+            return False
+        if self._bootstrap_mode == 'always':
+            return True
+        from kubernetes import client
+        try:
+            self.kubernetes_api('ApiextensionsV1Api').read_custom_resource_definition(f"{CRD_PLURAL}.{CRD_GROUP}")
+            return False
+        except client.rest.ApiException as e:
+            if e.status != 404:
+                logging.warning(f"Could not look up the LambdaCanary custom resource definition: {e.reason}.")
+            return True
+
+    def _get(self, name, create):
+        component = self._components.get(name)
+        if component is not None:
+            return component
+        with self._lock:
+            component = self._components.get(name)
+            if component is None:
+                component = self._time(name, create)
+                self._components[name] = component
+            return component
+
+    def _time(self, step, func, *args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._steps[step] = elapsed
+            STARTUP_SECONDS.labels(step).set(elapsed)
+
+    def _count_aws_requests(self):
+        from controller.aws import get_client_factory
+        return get_client_factory().requests
+
+    def _load_kube_config(self):
+        from kubernetes import config
+        try:
+            config.load_incluster_config()
+        except config.ConfigException:
+            logging.info("Not running in a cluster, loading the kubeconfig file.")
+            config.load_kube_config()
+        return True
+
+
+_default_context = None
+_default_context_lock = threading.Lock()
+
+
+def get_context():
+    """
+    Get the controller context shared by all modules.
+    """
+    global _default_context
+    with _default_context_lock:
+        if _default_context is None:
+            _default_context = ControllerContext()
+        return _default_context
@@ -0,0 +1,228 @@
+import collections
+import json
+import logging
+import threading
+import time
+
+from controller.config import EVENT_BUFFER_SIZE, EVENT_HEARTBEAT_INTERVAL, EVENT_HISTORY
+from controller.telemetry import EVENT_SUBSCRIBERS, EVENTS_DROPPED_SUBSCRIBERS, EVENTS_PUBLISHED
+
+RESET = 'reset'
+DROPPED = 'dropped'
+
+
+class Subscription:
+    def __init__(self, bus, buffer_size, names=None, wakeup=None):
+        self._bus = bus
+        self._cond = threading.Condition()
+        self._events = collections.deque()
+        self._buffer_size = buffer_size
+        self._names = names
+        self._wakeup = wakeup
+        self.last_event_id = None
+        self.dropped = False
+        self.closed = False
+
+    def get(self, timeout=None):
+        """
+        Take all buffered events, waiting up to timeout seconds for one to arrive when the buffer is empty.
+
+        Once the subscriber has been dropped, the remaining events are followed by a final 'dropped' event.
+        """
+        with self._cond:
+            if not self._events and not self.dropped and not self.closed and timeout != 0:
+                self._cond.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            if self.dropped and not self.closed:
+                self.closed = True
+                last_event_id = events[-1]['id'] if events else self.last_event_id
+                events.append(control_event(DROPPED, lastEventId=last_event_id))
+            for event in events:
+                if event['id'] is not None:
+                    self.last_event_id = event['id']
+            return events
+
+    def close(self):
+        """
+        Stop receiving events.
+        """
+        self._bus.unsubscribe(self)
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def _offer(self, event, replay=False):
+        if self._names and event['name'] not in self._names and event['type'] != RESET:
+            return True
+        with self._cond:
+            if self.closed or self.dropped:
+                return False
+            if not replay and len(self._events) >= self._buffer_size:
+                self.dropped = True
+            else:
+                self._events.append(event)
+            self._cond.notify_all()
+        if self._wakeup:
+            self._wakeup()
+        return not self.dropped
+
+
+class EventBus:
+    def __init__(self, history=EVENT_HISTORY, buffer_size=EVENT_BUFFER_SIZE):
+        self._lock = threading.Lock()
+        self._history = collections.deque(maxlen=history)
+        self._buffer_size = buffer_size
+        self._subscribers = set()
+        self._next_id = 1
+
+    def publish(self, event_type, name, **data):
+        """
+        Record a rollout event and hand it to every subscriber, dropping those whose buffer is full.
+
+        A subscriber whose wakeup fails, e.g. because its event loop has closed, is closed so it cannot
+        keep the publisher from reaching the others.
+        """
+        with self._lock:
+            event = {'id': self._next_id, 'type': event_type, 'name': name, 'time': time.time(), 'data': data}
+            self._next_id += 1
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        EVENTS_PUBLISHED.labels(event_type).inc()
+        for subscription in subscribers:
+            try:
+                offered = subscription._offer(event)
+            except Exception as e:
+                logging.error(f"Closed an event subscriber that failed at event {event['id']}: {e}.")
+                subscription.close()
+                continue
+            if not offered:
+                self.unsubscribe(subscription)
+                EVENTS_DROPPED_SUBSCRIBERS.inc()
+                logging.warning(f"Dropped a slow event subscriber at event {event['id']}.")
+        return event
+
+    def subscribe(self, last_event_id=None, names=None, wakeup=None):
+        """
+        Subscribe to rollout events, optionally only those of the given canaries.
+
+        When last_event_id is given, the retained events after it are replayed first. If some of them
+        are no longer retained, the replay starts with a 'reset' event telling the client to re-read
+        the canaries' status. The wakeup callable, if any, is invoked from the publishing thread
+        whenever an event is buffered.
+        """
+        subscription = Subscription(self, self._buffer_size, set(names) if names else None, wakeup)
+        with self._lock:
+            if last_event_id is not None:
+                oldest = self._history[0]['id'] if self._history else self._next_id
+                if last_event_id + 1 < oldest or last_event_id >= self._next_id:
+                    subscription._offer(control_event(RESET), replay=True)
+                for event in self._history:
+                    if event['id'] > last_event_id:
+                        subscription._offer(event, replay=True)
+            self._subscribers.add(subscription)
+            EVENT_SUBSCRIBERS.set(len(self._subscribers))
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        Stop handing events to a subscription.
+        """
+        with self._lock:
+            self._subscribers.discard(subscription)
+            EVENT_SUBSCRIBERS.set(len(self._subscribers))
+
+
+class StatusEventFeed:
+    def __init__(self, bus):
+        self._bus = bus
+        self._lock = threading.Lock()
+        self._status = {}
+
+    def on_event(self, event_type, canary):
+        """
+        Publish weight changes, wave changes, analysis verdicts, promotions and rollbacks found by comparing a canary's
+        status with the last one seen.
+
+        Informer handler with the (event_type, obj) signature. The first status seen of a canary, e.g.
+        on the initial list, only becomes the baseline.
+        """
+        name = canary['metadata']['name']
+        status = canary.get('status') or {}
+        with self._lock:
+            if event_type == 'DELETED':
+                self._status.pop(name, None)
+                self._bus.publish('deleted', name)
+                return
+            previous = self._status.get(name)
+            self._status[name] = status
+            if previous is None:
+                return
+            if status.get('analysis') and status.get('analysis') != previous.get('analysis'):
+                self._bus.publish('verdict', name, analysis=status['analysis'])
+            if status.get('currentWeight') != previous.get('currentWeight'):
+                self._bus.publish(
+                    'weight', name, previous=previous.get('currentWeight'), weight=status.get('currentWeight')
+                )
+            if status.get('currentWave') is not None and status.get('currentWave') != previous.get('currentWave'):
+                self._bus.publish('wave', name, wave=status['currentWave'], regions=status.get('regions'))
+            if status.get('phase') != previous.get('phase') and status.get('phase') in ('Promoted', 'RolledBack'):
+                self._bus.publish(status['phase'].lower(), name, weight=status.get('currentWeight'))
+
+
+def control_event(event_type, **data):
+    """
+    Build an event that is about the stream itself rather than a canary; it has no id to resume from.
+    """
+    return {'id': None, 'type': event_type, 'name': None, 'time': time.time(), 'data': data}
+
+
+def parse_event_id(value):
+    """
+    Parse the id a client resumes from, as sent in a Last-Event-ID header or a query parameter.
+    """
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError("Invalid event id")
+
+
+def format_sse(event):
+    """
+    Serialize an event as a Server-Sent Events message.
+    """
+    lines = [] if event['id'] is None else [f"id: {event['id']}"]
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def format_ndjson(event):
+    """
+    Serialize an event as one line of newline-delimited JSON.
+    """
+    return json.dumps(event, separators=(',', ':')) + '\n'
+
+
+def keepalive(formatter):
+    """
+    Get the message that keeps an idle stream open: an SSE comment or an empty NDJSON line.
+    """
+    return ': keepalive\n\n' if formatter is format_sse else '\n'
+
+
+def iter_events(subscription, formatter, heartbeat=EVENT_HEARTBEAT_INTERVAL):
+    """
+    Serialize a subscription's events as they arrive until it is dropped, closing it when the client goes away.
+    """
+    try:
+        while not subscription.closed:
+            events = subscription.get(heartbeat)
+            if not events:
+                yield keepalive(formatter)
+            for event in events:
+                yield formatter(event)
+    finally:
+        subscription.close()
@@ -7,4 +7,13 @@ def health_check():
     """
     Simple health check endpoint.
     """
-    return jsonify({'status': 'OK'})
\ No newline at end of file
+    return jsonify({'status': 'OK'})
+
+@health_check_bp.route('/ready', methods=['GET'])
+def ready():
+    """
+    Readiness endpoint reporting the controller's startup progress and time.
+    """
+    from controller.context import get_context
+    report = get_context().readiness()
+    return jsonify(report), 200 if report['ready'] else 503
@@ -0,0 +1,274 @@
+import bisect
+import logging
+import threading
+import time
+
+from controller.config import (
+    CRD_GROUP,
+    CRD_PLURAL,
+    CRD_VERSION,
+    INFORMER_LIST_PAGE_SIZE,
+    INFORMER_WATCH_TIMEOUT,
+    NAMESPACE,
+)
+from controller.telemetry import (
+    INFORMER_OBJECTS,
+    INFORMER_RELISTS,
+    INFORMER_STALENESS_SECONDS,
+    INFORMER_WATCH_LAG_SECONDS,
+    KUBERNETES_CALL_SECONDS,
+    timed,
+)
+from controller.utils import parse_time
+
+
+def function_name_index(obj):
+    """
+    Index LambdaCanary objects by the Lambda function they roll out.
+    """
+    function_name = obj.get('functionName')
+    return [function_name] if function_name else []
+
+
+class CanaryStore:
+    def __init__(self, indexers=None):
+        self._lock = threading.RLock()
+        self._items = {}
+        self._names = []
+        self._indexers = indexers or {'functionName': function_name_index}
+        self._indices = {name: {} for name in self._indexers}
+        self.resource_version = None
+
+    def get(self, name):
+        """
+        Get a LambdaCanary object by name.
+        """
+        with self._lock:
+            return self._items.get(name)
+
+    def list(self):
+        """
+        List all LambdaCanary objects in the store.
+        """
+        with self._lock:
+            return list(self._items.values())
+
+    def by_index(self, index_name, value):
+        """
+        List the LambdaCanary objects whose index value matches.
+        """
+        with self._lock:
+            names = self._indices[index_name].get(value, ())
+            return [self._items[name] for name in names]
+
+    def snapshot(self, after=None, index_name=None, value=None):
+        """
+        Get the LambdaCanary objects sorted by name, starting after the given name, and the resourceVersion
+        they were read at.
+
+        Passing an index name and value restricts the snapshot to the objects whose index value matches.
+        """
+        with self._lock:
+            if index_name is None:
+                names = self._names[bisect.bisect_right(self._names, after):] if after else list(self._names)
+            else:
+                names = sorted(name for name in self._indices[index_name].get(value, ()) if not after or name > after)
+            return [self._items[name] for name in names], self.resource_version
+
+    def replace(self, items, resource_version):
+        """
+        Replace the contents of the store with the result of a full list.
+        """
+        with self._lock:
+            self._items = {}
+            self._names = []
+            self._indices = {name: {} for name in self._indexers}
+            for obj in items:
+                self._add(obj)
+            self.resource_version = resource_version
+            INFORMER_OBJECTS.set(len(self._items))
+
+    def upsert(self, obj):
+        """
+        Add or update a LambdaCanary object.
+        """
+        with self._lock:
+            self._remove(obj['metadata']['name'])
+            self._add(obj)
+            self.resource_version = obj['metadata'].get('resourceVersion', self.resource_version)
+            INFORMER_OBJECTS.set(len(self._items))
+
+    def delete(self, obj):
+        """
+        Remove a LambdaCanary object.
+        """
+        with self._lock:
+            self._remove(obj['metadata']['name'])
+            self.resource_version = obj['metadata'].get('resourceVersion', self.resource_version)
+            INFORMER_OBJECTS.set(len(self._items))
+
+    def _add(self, obj):
+        name = obj['metadata']['name']
+        self._items[name] = obj
+        bisect.insort(self._names, name)
+        for index_name, indexer in self._indexers.items():
+            for value in indexer(obj):
+                self._indices[index_name].setdefault(value, set()).add(name)
+
+    def _remove(self, name):
+        obj = self._items.pop(name, None)
+        if obj is None:
+            return
+        del self._names[bisect.bisect_left(self._names, name)]
+        for index_name, indexer in self._indexers.items():
+            for value in indexer(obj):
+                names = self._indices[index_name].get(value)
+                if names:
+                    names.discard(name)
+                    if not names:
+                        del self._indices[index_name][value]
+
+
+class CanaryInformer:
+    def __init__(self, custom_api, namespace=NAMESPACE, store=None, watch_timeout=INFORMER_WATCH_TIMEOUT,
+                 page_size=INFORMER_LIST_PAGE_SIZE):
+        self._custom_api = custom_api
+        self._namespace = namespace
+        self._watch_timeout = watch_timeout
+        self._page_size = page_size
+        self._handlers = []
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._last_contact = time.time()
+        self.store = store or CanaryStore()
+
+    def add_handler(self, handler):
+        """
+        Register a callable invoked with (event_type, obj) for every change applied to the store.
+        """
+        self._handlers.append(handler)
+
+    def start(self):
+        """
+        Start the list+watch loop in a background thread.
+        """
+        INFORMER_STALENESS_SECONDS.set_function(self.staleness)
+        self._thread = threading.Thread(target=self._run, name='canary-informer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the list+watch loop after the current watch returns.
+        """
+        self._stopped.set()
+
+    def wait_for_sync(self, timeout=None):
+        """
+        Block until the first full list has been loaded into the store.
+        """
+        return self._synced.wait(timeout)
+
+    def has_synced(self):
+        """
+        Check whether the first full list has been loaded into the store.
+        """
+        return self._synced.is_set()
+
+    def staleness(self):
+        """
+        Get the number of seconds since the informer last heard from the API server.
+        """
+        return time.time() - self._last_contact
+
+    def _run(self):
+        from kubernetes import client
+        backoff = 1
+        while not self._stopped.is_set():
+            try:
+                if self.store.resource_version is None:
+                    self._list()
+                self._watch()
+                backoff = 1
+            except client.rest.ApiException as e:
+                if e.status == 410:
+                    logging.info("LambdaCanary watch expired, relisting.")
+                    self.store.resource_version = None
+                    continue
+                logging.error(f"LambdaCanary watch failed: {e.reason}.")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            except Exception as e:
+                logging.error(f"LambdaCanary watch failed: {e}.")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    @timed(KUBERNETES_CALL_SECONDS, 'list_lambdacanaries')
+    def _list_objects(self, continue_token=None):
+        kwargs = {'limit': self._page_size}
+        if continue_token:
+            kwargs['_continue'] = continue_token
+        return self._custom_api.list_namespaced_custom_object(
+            CRD_GROUP, CRD_VERSION, self._namespace, CRD_PLURAL, **kwargs
+        )
+
+    def _list(self):
+        items = []
+        continue_token = None
+        while True:
+            response = self._list_objects(continue_token)
+            items.extend(response.get('items', []))
+            continue_token = response['metadata'].get('continue')
+            if not continue_token:
+                break
+        previous = self.store.list()
+        self.store.replace(items, response['metadata']['resourceVersion'])
+        self._last_contact = time.time()
+        self._synced.set()
+        INFORMER_RELISTS.inc()
+        logging.info(f"Listed {len(items)} LambdaCanary objects.")
+        listed = {obj['metadata']['name'] for obj in items}
+        for obj in previous:
+            if obj['metadata']['name'] not in listed:
+                self._notify('DELETED', obj)
+        for obj in items:
+            self._notify('ADDED', obj)
+
+    def _watch(self):
+        from kubernetes import client, watch
+        stream = watch.Watch().stream(
+            self._custom_api.list_namespaced_custom_object,
+            CRD_GROUP, CRD_VERSION, self._namespace, CRD_PLURAL,
+            resource_version=self.store.resource_version,
+            allow_watch_bookmarks=True,
+            timeout_seconds=self._watch_timeout
+        )
+        for event in stream:
+            self._last_contact = time.time()
+            event_type = event['type']
+            obj = event['object']
+            if event_type == 'ERROR':
+                raise client.rest.ApiException(status=obj.get('code'), reason=obj.get('message'))
+            if event_type == 'BOOKMARK':
+                self.store.resource_version = obj['metadata']['resourceVersion']
+                continue
+            if event_type == 'DELETED':
+                self.store.delete(obj)
+            else:
+                self.store.upsert(obj)
+                self._observe_lag(obj)
+            self._notify(event_type, obj)
+            if self._stopped.is_set():
+                return
+
+    def _observe_lag(self, obj):
+        times = [entry['time'] for entry in obj['metadata'].get('managedFields', []) if entry.get('time')]
+        if times:
+            INFORMER_WATCH_LAG_SECONDS.observe(max(0, self._last_contact - parse_time(max(times))))
+
+    def _notify(self, event_type, obj):
+        for handler in self._handlers:
+            try:
+                handler(event_type, obj)
+            except Exception as e:
+                logging.error(f"LambdaCanary event handler failed: {e}.")
@@ -0,0 +1,119 @@
+import json
+import logging
+import mmap
+import os
+import threading
+
+from controller.config import JOURNAL_COMPACT_RATIO, JOURNAL_FSYNC, JOURNAL_PATH
+from controller.telemetry import JOURNAL_COMPACTIONS, JOURNAL_RECORDS
+
+
+class RolloutJournal:
+    def __init__(self, path=JOURNAL_PATH, fsync=JOURNAL_FSYNC, compact_ratio=JOURNAL_COMPACT_RATIO):
+        self._path = path
+        self._fsync = fsync
+        self._compact_ratio = compact_ratio
+        self._lock = threading.Lock()
+        self._latest = {}
+        self._appended = 0
+        self._file = None
+
+    def replay(self):
+        """
+        Read the journal in bulk and get the latest recorded state of every canary.
+
+        A record cut short by a crash at the end of the file is ignored. The journal is compacted
+        afterwards and opened for appending.
+        """
+        latest = {}
+        skipped = 0
+        if os.path.exists(self._path) and os.path.getsize(self._path):
+            with open(self._path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                position = 0
+                while position < len(data):
+                    end = data.find(b'\n', position)
+                    if end < 0:
+                        skipped += 1
+                        break
+                    try:
+                        record = json.loads(data[position:end])
+                        if record.get('deleted'):
+                            latest.pop(record['name'], None)
+                        else:
+                            latest[record['name']] = record
+                    except (ValueError, KeyError):
+                        skipped += 1
+                    position = end + 1
+        if skipped:
+            logging.warning(f"Skipped {skipped} unreadable rollout journal records.")
+        with self._lock:
+            self._latest = latest
+            self._compact()
+        logging.info(f"Replayed the rollout journal of {len(latest)} canaries.")
+        return {name: dict(record) for name, record in latest.items()}
+
+    def record(self, name, **state):
+        """
+        Append the current rollout state of a canary; it replaces everything recorded for it before.
+        """
+        self._append(dict(state, name=name))
+
+    def forget(self, name):
+        """
+        Append a tombstone so a deleted or finished canary is not resumed.
+        """
+        with self._lock:
+            if name not in self._latest:
+                return
+        self._append({'name': name, 'deleted': True})
+
+    def close(self):
+        """
+        Flush and close the journal file.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+
+    def _append(self, record):
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._lock:
+            if record.get('deleted'):
+                self._latest.pop(record['name'], None)
+            else:
+                self._latest[record['name']] = record
+            if self._file is None:
+                self._open()
+            self._file.write(line.encode())
+            self._sync()
+            self._appended += 1
+            JOURNAL_RECORDS.inc()
+            if self._appended > self._compact_ratio * max(len(self._latest), 64):
+                self._compact()
+
+    def _compact(self):
+        if self._file is not None:
+            self._file.close()
+        directory = os.path.dirname(self._path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{self._path}.tmp"
+        with open(temporary, 'wb') as f:
+            for record in self._latest.values():
+                f.write((json.dumps(record, separators=(',', ':')) + '\n').encode())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self._path)
+        self._appended = len(self._latest)
+        JOURNAL_COMPACTIONS.inc()
+        self._open()
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self._path) or '.', exist_ok=True)
+        self._file = open(self._path, 'ab', buffering=0)
+
+    def _sync(self):
+        self._file.flush()
+        if self._fsync:
+            os.fsync(self._file.fileno())
@@ -1,25 +1,43 @@
-from kubernetes import client, config
 import logging
 
-config.load_incluster_config()
-extensions_v1_beta1 = client.ExtensionsV1beta1Api()
-custom_api = client.CustomObjectsApi()
+from controller.bulk import SPEC_FIELDS, create_canary_object, delete_canary_object, patch_canary_object
+from controller.config import CRD_GROUP, CRD_PLURAL, CRD_VERSION, NAMESPACE
+from controller.context import get_context
+from controller.spec import CANARY_SCHEMA
+from controller.telemetry import KUBERNETES_CALL_SECONDS, timed
 
+@timed(KUBERNETES_CALL_SECONDS, 'create_custom_resource_definition')
 def create_custom_resource_definition():
     """
     Create the LambdaCanary custom resource definition.
     """
+    from kubernetes import client
+    schema = dict(CANARY_SCHEMA, properties={
+        **CANARY_SCHEMA["properties"],
+        "apiVersion": {
+            "type": "string"
+        },
+        "kind": {
+            "type": "string"
+        },
+        "metadata": {
+            "type": "object"
+        },
+        "status": {
+            "type": "object",
+            "x-kubernetes-preserve-unknown-fields": True
+        }
+    })
     crd = {
-        "apiVersion": "apiextensions.k8s.io/v1beta1",
+        "apiVersion": "apiextensions.k8s.io/v1",
         "kind": "CustomResourceDefinition",
         "metadata": {
-            "name": "lambdacanaries.awesomeapp.com"
+            "name": f"{CRD_PLURAL}.{CRD_GROUP}"
         },
         "spec": {
-            "group": "awesomeapp.com",
-            "version": "v1",
+            "group": CRD_GROUP,
             "names": {
-                "plural": "lambdacanaries",
+                "plural": CRD_PLURAL,
                 "singular": "lambdacanary",
                 "kind": "LambdaCanary",
                 "shortNames": [
@@ -27,48 +45,60 @@ def create_custom_resource_definition():
                 ]
             },
             "scope": "Namespaced",
-            "subresources": {
-                "status": {}
-            },
-            "validation": {
-                "openAPIV3Schema": {
-                    "properties": {
-                        "functionName": {
-                            "type": "string"
-                        },
-                        "newVersion": {
-                            "type": "string"
-                        },
-                        "oldVersion": {
-                            "type": "string"
-                        },
-                        "policy": {
-                            "type": "object"
-                        }
+            "versions": [
+                {
+                    "name": CRD_VERSION,
+                    "served": True,
+                    "storage": True,
+                    "subresources": {
+                        "status": {}
                     },
-                    "required": [
-                        "functionName",
-                        "newVersion",
-                        "oldVersion",
-                        "policy"
-                    ]
+                    "schema": {
+                        "openAPIV3Schema": schema
+                    }
                 }
-            }
+            ]
         }
     }
 
     try:
-        custom_api.create_custom_resource_definition(crd)
+        get_context().kubernetes_api('ApiextensionsV1Api').create_custom_resource_definition(crd)
         logging.info("LambdaCanary custom resource definition created.")
     except client.rest.ApiException as e:
         if e.status != 409:
             raise e
         logging.info("LambdaCanary custom resource definition already exists.")
 
+def create_canary_deployment(name, spec, namespace=NAMESPACE):
+    """
+    Create a LambdaCanary object with the given spec.
+    """
+    body = dict(spec, apiVersion=f"{CRD_GROUP}/{CRD_VERSION}", kind="LambdaCanary", metadata={"name": name})
+    create_canary_object(get_context().custom_api, body, namespace)
+    logging.info(f"Canary deployment '{name}' created.")
+
+def update_canary_deployment(name, spec, namespace=NAMESPACE):
+    """
+    Replace the spec of a LambdaCanary object, removing the optional fields the new spec leaves out.
+    """
+    patch = dict.fromkeys(SPEC_FIELDS)
+    patch.update(spec)
+    patch_canary_object(get_context().custom_api, name, patch, namespace)
+    logging.info(f"Canary deployment '{name}' updated.")
+
+def delete_canary_deployment(name, namespace=NAMESPACE):
+    """
+    Delete a LambdaCanary object.
+    """
+    delete_canary_object(get_context().custom_api, name, namespace)
+    logging.info(f"Canary deployment '{name}' deleted.")
+
+@timed(KUBERNETES_CALL_SECONDS, 'create_service_account')
 def create_service_account(namespace):
     """
     Create the service account for the controller.
     """
+    from kubernetes import client
     body = {
         "metadata": {
             "name": "lambda-canary-controller",
@@ -77,7 +107,7 @@ def create_service_account(namespace):
     }
 
     try:
-        api = client.CoreV1Api()
+        api = get_context().kubernetes_api('CoreV1Api')
         api.create_namespaced_service_account(namespace, body)
         logging.info("Service account created.")
     except client.rest.ApiException as e:
@@ -85,15 +115,27 @@ def create_service_account(namespace):
             raise e
         logging.info("Service account already exists.")
 
+@timed(KUBERNETES_CALL_SECONDS, 'create_cluster_role')
 def create_cluster_role(namespace):
     """
     Create the cluster role for the controller.
     """
+    from kubernetes import client
     rules = [
         {
             "apiGroups": ["awesomeapp.com"],
             "resources": ["lambdacanaries"],
-            "verbs": ["get", "list", "watch", "create", "update", "delete"]
+            "verbs": ["get", "list", "watch", "create", "update", "patch", "delete"]
+        },
+        {
+            "apiGroups": ["awesomeapp.com"],
+            "resources": ["lambdacanaries/status"],
+            "verbs": ["get", "update", "patch"]
+        },
+        {
+            "apiGroups": ["coordination.k8s.io"],
+            "resources": ["leases"],
+            "verbs": ["get", "list", "watch", "create", "update", "patch", "delete"]
         },
         {
             "apiGroups": [""],
@@ -112,7 +154,7 @@ def create_cluster_role(namespace):
     }
 
     try:
-        api = client.RbacAuthorizationV1Api()
+        api = get_context().kubernetes_api('RbacAuthorizationV1Api')
         api.create_cluster_role(body)
         logging.info("Cluster role created.")
     except client.rest.ApiException as e:
@@ -124,6 +166,7 @@ def create_cluster_role(namespace):
         """
         Create the cluster role binding for the service account.
         """
+        from kubernetes import client
         body = {
             "apiVersion": "rbac.authorization.k8s.io/v1",
             "kind": "ClusterRoleBinding",
@@ -145,7 +188,7 @@ def create_cluster_role(namespace):
         }
 
         try:
-            api = client.RbacAuthorizationV1Api()
+            api = get_context().kubernetes_api('RbacAuthorizationV1Api')
             api.create_cluster_role_binding(body)
             logging.info("Cluster role binding created.")
         except client.rest.ApiException as e:
@@ -157,6 +200,7 @@ def create_cluster_role(namespace):
         """
         Create the deployment for the controller.
         """
+        from kubernetes import client
         deployment = {
             "apiVersion": "apps/v1",
             "kind": "Deployment",
@@ -168,7 +212,7 @@ def create_cluster_role(namespace):
                 }
             },
             "spec": {
-                "replicas": 1,
+                "replicas": 3,
                 "selector": {
                     "matchLabels": {
                         "app": "lambda-canary-controller"
@@ -187,6 +231,14 @@ def create_cluster_role(namespace):
                                 "name": "lambda-canary-controller",
                                 "image": f"my-registry.com/lambda-canary-controller:{image_tag}",
                                 "env": [
+                                    {
+                                        "name": "POD_NAME",
+                                        "valueFrom": {
+                                            "fieldRef": {
+                                                "fieldPath": "metadata.name"
+                                            }
+                                        }
+                                    },
                                     {
                                         "name": "NAMESPACE",
                                         "valueFrom": {
@@ -223,7 +275,7 @@ def create_cluster_role(namespace):
         }
 
         try:
-            api = client.AppsV1Api()
+            api = get_context().kubernetes_api('AppsV1Api')
             api.create_namespaced_deployment(namespace, deployment)
             logging.info("Deployment created.")
         except client.rest.ApiException as e:
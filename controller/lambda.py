@@ -1,28 +1,221 @@
-import boto3
 import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
+
+from controller.aws import get_client_factory
+from controller.config import LAMBDA_ALIAS_TTL, PREWARM_CONCURRENCY, PREWARM_HEADROOM
+from controller.telemetry import AWS_CALL_SECONDS, LAMBDA_CACHE_LOOKUPS, timed
+from controller.utils import get_traffic_config
+
+
+_version_hits = LAMBDA_CACHE_LOOKUPS.labels("version", "hit")
+_version_misses = LAMBDA_CACHE_LOOKUPS.labels("version", "miss")
+_alias_hits = LAMBDA_CACHE_LOOKUPS.labels("alias", "hit")
+_alias_misses = LAMBDA_CACHE_LOOKUPS.labels("alias", "miss")
+
+
+def is_published_version(qualifier):
+    """
+    Check whether a qualifier names a published, and therefore immutable, Lambda version.
+    """
+    return qualifier is not None and qualifier.isdigit()
+
+
+def get_provisioned_concurrency_size(peak_concurrency, canary_percentage, headroom=PREWARM_HEADROOM):
+    """
+    Size the provisioned concurrency of a canary version for the share of the peak concurrency it is about to get.
+    """
+    return max(1, math.ceil(peak_concurrency * canary_percentage / 100 * headroom))
 
 
 class LambdaClient:
-    def __init__(self, region_name):
-        self._client = boto3.client("lambda", region_name=region_name)
+    def __init__(self, region_name, client_factory=None, alias_ttl=LAMBDA_ALIAS_TTL):
+        self._client = (client_factory or get_client_factory()).client("lambda", region_name)
+        self._cache_lock = threading.Lock()
+        self._versions = {}
+        self._aliases = {}
+        self._alias_ttl = alias_ttl
+        self._warmed = set()
 
-    def update_alias(self, function_name, function_version, alias_name):
+    def update_alias(self, function_name, function_version, alias_name, additional_version_weights=None):
         """
         Update an alias on a Lambda function with the specified version.
+
+        Any traffic split on the alias is replaced by additional_version_weights, so without weights
+        the alias sends all of its traffic to function_version. The call is skipped when the alias cached
+        within the TTL already matches, and it is conditional on the cached RevisionId so changes made by
+        others are not overwritten. On such a conflict the alias is read again and the update retried once,
+        conditional on the fresh RevisionId.
+        """
+        weights = additional_version_weights or {}
+        key = (function_name, alias_name)
+        for attempt in range(2):
+            with self._cache_lock:
+                cached = self._aliases.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self._alias_ttl:
+                alias = cached[1]
+                routing = (alias.get("RoutingConfig") or {}).get("AdditionalVersionWeights") or {}
+                if alias.get("FunctionVersion") == function_version and routing == weights:
+                    logging.debug(f"Alias '{alias_name}' on '{function_name}' already up to date.")
+                    return
+            kwargs = {
+                "FunctionName": function_name,
+                "Name": alias_name,
+                "FunctionVersion": function_version,
+                "RoutingConfig": {
+                    "AdditionalVersionWeights": weights
+                }
+            }
+            if cached is not None and cached[1].get("RevisionId"):
+                kwargs["RevisionId"] = cached[1]["RevisionId"]
+            try:
+                response = self._update_alias(kwargs)
+                self._cache_alias(key, response)
+                logging.info(f"Alias '{alias_name}' on '{function_name}' updated to '{function_version}' with weights {weights}.")
+                return
+            except ClientError as e:
+                self.invalidate_alias(function_name, alias_name)
+                if e.response["Error"]["Code"] == "PreconditionFailedException" and attempt == 0:
+                    logging.warning(f"Alias '{alias_name}' on '{function_name}' changed meanwhile, reading it again.")
+                    self.get_alias(function_name, alias_name)
+                    continue
+                logging.error(f"Could not update alias '{alias_name}' on '{function_name}': {e.response['Error']['Message']}.")
+                raise e
+
+    def get_alias(self, function_name, alias_name):
+        """
+        Get the configuration of an alias, served from a short-lived cache.
         """
+        key = (function_name, alias_name)
+        with self._cache_lock:
+            cached = self._aliases.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self._alias_ttl:
+            _alias_hits.inc()
+            return cached[1]
+        _alias_misses.inc()
         try:
-            self._client.update_alias(
-                FunctionName=function_name,
-                Name=alias_name,
-                FunctionVersion=function_version
-            )
-            logging.info(f"Alias '{alias_name}' on '{function_name}' updated to '{function_version}'.")
+            response = self._get_alias(function_name, alias_name)
         except ClientError as e:
-            logging.error(f"Could not update alias '{alias_name}' on '{function_name}': {e.response['Error']['Message']}.")
+            logging.error(f"Could not get alias '{alias_name}' on '{function_name}': {e.response['Error']['Message']}.")
             raise e
+        return self._cache_alias(key, response)
+
+    @timed(AWS_CALL_SECONDS, "lambda", "update_alias")
+    def _update_alias(self, kwargs):
+        return self._client.update_alias(**kwargs)
+
+    @timed(AWS_CALL_SECONDS, "lambda", "get_alias")
+    def _get_alias(self, function_name, alias_name):
+        return self._client.get_alias(FunctionName=function_name, Name=alias_name)
+
+    def invalidate_alias(self, function_name, alias_name):
+        """
+        Drop the cached configuration of an alias.
+        """
+        with self._cache_lock:
+            self._aliases.pop((function_name, alias_name), None)
 
+    def export_alias(self, function_name, alias_name):
+        """
+        Get the cached configuration of an alias, or None, for recording in the rollout journal.
+        """
+        with self._cache_lock:
+            cached = self._aliases.get((function_name, alias_name))
+        return None if cached is None else dict(cached[1])
+
+    def restore_alias(self, function_name, alias_name, alias):
+        """
+        Seed the alias cache from the rollout journal.
+
+        The restored alias lets update_alias pass its RevisionId, but it counts as expired, so it never
+        skips an update and reads still go to Lambda.
+        """
+        with self._cache_lock:
+            self._aliases[(function_name, alias_name)] = (float("-inf"), dict(alias))
+
+    @timed(AWS_CALL_SECONDS, "lambda", "list_aliases")
+    def list_aliases(self, function_name):
+        """
+        Get all aliases of a Lambda function in bulk and refresh the alias cache with them.
+        """
+        aliases = []
+        try:
+            for page in self._client.get_paginator("list_aliases").paginate(FunctionName=function_name):
+                aliases.extend(page.get("Aliases", []))
+        except ClientError as e:
+            logging.error(f"Could not list aliases of '{function_name}': {e.response['Error']['Message']}.")
+            raise e
+        for alias in aliases:
+            self._cache_alias((function_name, alias["Name"]), alias)
+        return aliases
+
+    @timed(AWS_CALL_SECONDS, "lambda", "list_versions_by_function")
+    def list_versions(self, function_name):
+        """
+        Get all versions of a Lambda function in bulk and cache the configurations of the published ones.
+        """
+        versions = []
+        try:
+            for page in self._client.get_paginator("list_versions_by_function").paginate(FunctionName=function_name):
+                versions.extend(page.get("Versions", []))
+        except ClientError as e:
+            logging.error(f"Could not list versions of '{function_name}': {e.response['Error']['Message']}.")
+            raise e
+        with self._cache_lock:
+            for version in versions:
+                if is_published_version(version.get("Version")):
+                    self._versions[(function_name, version["Version"])] = version
+        return versions
+
+    def prefetch(self, function_name):
+        """
+        Warm the version and alias caches of a Lambda function with two paginated list calls.
+        """
+        self.list_versions(function_name)
+        return self.list_aliases(function_name)
+
+    def get_version_configuration(self, function_name, qualifier):
+        """
+        Get the configuration of a function version; published versions are immutable and cached indefinitely.
+        """
+        key = (function_name, qualifier)
+        with self._cache_lock:
+            configuration = self._versions.get(key)
+        if configuration is not None:
+            _version_hits.inc()
+            return configuration
+        _version_misses.inc()
+        configuration = self._get_function(function_name, qualifier).get("Configuration", {})
+        if is_published_version(qualifier):
+            with self._cache_lock:
+                self._versions[key] = configuration
+        return configuration
+
+    def _cache_alias(self, key, alias):
+        alias = {field: alias.get(field) for field in ("Name", "FunctionVersion", "RoutingConfig", "RevisionId")}
+        with self._cache_lock:
+            self._aliases[key] = (time.monotonic(), alias)
+        return alias
+
+    def shift_traffic(self, function_name, alias_name, stable_version, canary_version, canary_percentage):
+        """
+        Route a percentage of an alias's traffic to the canary version and the rest to the stable version.
+        """
+        traffic = get_traffic_config(canary_percentage)
+        if traffic["stable"] <= 0:
+            self.update_alias(function_name, canary_version, alias_name)
+        elif traffic["canary"] <= 0:
+            self.update_alias(function_name, stable_version, alias_name)
+        else:
+            self.update_alias(function_name, stable_version, alias_name, {
+                canary_version: round(traffic["canary"] / 100, 4)
+            })
+
+    @timed(AWS_CALL_SECONDS, "lambda", "create_canary_version")
     def create_canary_version(self, function_name, code_sha_256, execution_role_arn):
         """
         Create a new version of a Lambda function with the specified code SHA-256 hash.
@@ -51,6 +244,7 @@ class LambdaClient:
             logging.error(f"Could not promote canary version of '{function_name}': {e.response['Error']['Message']}.")
             raise e
 
+    @timed(AWS_CALL_SECONDS, "lambda", "delete_canary_version")
     def delete_canary_version(self, function_name, version):
         """
         Delete a canary version of a Lambda function.
@@ -60,6 +254,8 @@ class LambdaClient:
                 FunctionName=function_name,
                 Qualifier=version
             )
+            with self._cache_lock:
+                self._versions.pop((function_name, version), None)
             logging.info(f"Canary version '{version}' of '{function_name}' deleted.")
         except ClientError as e:
             logging.error(f"Could not delete canary version '{version}' of '{function_name}': {e.response['Error']['Message']}.")
@@ -69,21 +265,25 @@ class LambdaClient:
         """
         Get the SHA-256 hash of the code of a Lambda function.
         """
+        code_sha_256 = self.get_version_configuration(function_name, qualifier).get("CodeSha256")
+        if not code_sha_256:
+            message = f"Code SHA-256 for '{function_name}:{qualifier}' not found."
+            logging.error(message)
+            raise ValueError(message)
+        return code_sha_256
+
+    @timed(AWS_CALL_SECONDS, "lambda", "get_function")
+    def _get_function(self, function_name, qualifier):
         try:
-            response = self._client.get_function(
+            return self._client.get_function(
                 FunctionName=function_name,
                 Qualifier=qualifier
             )
-            code_sha_256 = response.get("Configuration", {}).get("CodeSha256")
-            if not code_sha_256:
-                message = f"Code SHA-256 for '{function_name}:{qualifier}' not found."
-                logging.error(message)
-                raise ValueError(message)
-            return code_sha_256
         except ClientError as e:
-            logging.error(f"Could not get code SHA-256 for '{function_name}:{qualifier}': {e.response['Error']['Message']}.")
+            logging.error(f"Could not get function '{function_name}:{qualifier}': {e.response['Error']['Message']}.")
             raise e
 
+    @timed(AWS_CALL_SECONDS, "lambda", "create_health_check")
     def create_health_check(self, function_name):
         """
         Create a health check for a Lambda function.
@@ -107,6 +307,7 @@ class LambdaClient:
             logging.error(f"Could not create health check for '{function_name}': {e.response['Error']['Message']}.")
             raise e
 
+    @timed(AWS_CALL_SECONDS, "lambda", "delete_health_check")
     def delete_health_check(self, function_name):
         """
         Delete a health check for a Lambda function.
@@ -126,17 +327,149 @@ class LambdaClient:
             logging.error(f"Could not delete health check for '{function_name}': {e.response['Error']['Message']}.")
             raise e
 
-    def invoke_lambda(self, function_name, payload):
+    @timed(AWS_CALL_SECONDS, "lambda", "invoke_lambda")
+    def invoke_lambda(self, function_name, payload, qualifier=None):
         """
-        Invoke a Lambda function with the specified payload.
+        Invoke a Lambda function, or one of its versions or aliases, with the specified payload.
+        """
+        kwargs = {"FunctionName": function_name, "Payload": payload}
+        if qualifier is not None:
+            kwargs["Qualifier"] = qualifier
+        try:
+            response = self._client.invoke(**kwargs)
+            logging.info(f"Function '{function_name}' invoked.")
+            return response["Payload"].read().decode("utf-8")
+        except ClientError as e:
+            logging.error(f"Could not invoke function '{function_name}': {e.response['Error']['Message']}.")
+            raise e
+
+    @timed(AWS_CALL_SECONDS, "lambda", "probe_lambda")
+    def probe_lambda(self, function_name, qualifier, payload, chunk_size=8192):
+        """
+        Invoke a qualified Lambda function and drain the response payload in chunks instead of buffering it.
+
+        Returns whether the invocation succeeded without a function error.
         """
         try:
             response = self._client.invoke(
                 FunctionName=function_name,
+                Qualifier=qualifier,
                 Payload=payload
             )
-            logging.info(f"Function '{function_name}' invoked.")
-            return response["Payload"].read().decode("utf-8")
+            for _ in response["Payload"].iter_chunks(chunk_size):
+                pass
+            return "FunctionError" not in response
         except ClientError as e:
-            logging.error(f"Could not invoke function '{function_name}': {e.response['Error']['Message']}.")
-            raise e
\ No newline at end of file
+            logging.warning(f"Probe of '{function_name}:{qualifier}' failed: {e.response['Error']['Message']}.")
+            return False
+        except BotoCoreError as e:
+            logging.warning(f"Probe of '{function_name}:{qualifier}' failed: {e}.")
+            return False
+
+    @timed(AWS_CALL_SECONDS, "lambda", "put_provisioned_concurrency_config")
+    def put_provisioned_concurrency(self, function_name, qualifier, concurrency):
+        """
+        Allocate provisioned concurrency on a version or alias of a Lambda function.
+        """
+        try:
+            response = self._client.put_provisioned_concurrency_config(
+                FunctionName=function_name,
+                Qualifier=qualifier,
+                ProvisionedConcurrentExecutions=concurrency
+            )
+            with self._cache_lock:
+                self._warmed.discard((function_name, qualifier))
+            logging.info(f"Allocating {concurrency} provisioned concurrency on '{function_name}:{qualifier}'.")
+            return response.get("Status")
+        except ClientError as e:
+            logging.error(f"Could not allocate provisioned concurrency on '{function_name}:{qualifier}': {e.response['Error']['Message']}.")
+            raise e
+
+    @timed(AWS_CALL_SECONDS, "lambda", "get_provisioned_concurrency_config")
+    def get_provisioned_concurrency(self, function_name, qualifier):
+        """
+        Get the provisioned concurrency configuration of a version or alias, or None if it has none.
+        """
+        try:
+            return self._client.get_provisioned_concurrency_config(
+                FunctionName=function_name,
+                Qualifier=qualifier
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ProvisionedConcurrencyConfigNotFoundException":
+                return None
+            logging.error(f"Could not get provisioned concurrency of '{function_name}:{qualifier}': {e.response['Error']['Message']}.")
+            raise e
+
+    @timed(AWS_CALL_SECONDS, "lambda", "delete_provisioned_concurrency_config")
+    def release_provisioned_concurrency(self, function_name, qualifier):
+        """
+        Release the provisioned concurrency of a version or alias, if it has any.
+        """
+        with self._cache_lock:
+            self._warmed.discard((function_name, qualifier))
+        try:
+            self._client.delete_provisioned_concurrency_config(
+                FunctionName=function_name,
+                Qualifier=qualifier
+            )
+            logging.info(f"Provisioned concurrency on '{function_name}:{qualifier}' released.")
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("ProvisionedConcurrencyConfigNotFoundException", "ResourceNotFoundException"):
+                return
+            logging.error(f"Could not release provisioned concurrency on '{function_name}:{qualifier}': {e.response['Error']['Message']}.")
+            raise e
+
+    def prewarm(self, function_name, qualifier, concurrency, invocations=0, payload=b"{}"):
+        """
+        Make sure a version or alias has at least the given provisioned concurrency ready, without blocking.
+
+        Allocates the concurrency when less is requested, then reports the allocation's progress: returns
+        True once it is READY, False while it is still being allocated, and raises RuntimeError when the
+        allocation failed. Once READY, the given number of warm-up invocations is fired through
+        invoke_lambda, once per allocation.
+        """
+        config = self.get_provisioned_concurrency(function_name, qualifier)
+        if config is None or config.get("RequestedProvisionedConcurrentExecutions", 0) < concurrency:
+            self.put_provisioned_concurrency(function_name, qualifier, concurrency)
+            return False
+        status = config.get("Status")
+        if status == "FAILED":
+            raise RuntimeError(f"Provisioned concurrency on '{function_name}:{qualifier}' failed: {config.get('StatusReason')}")
+        if status != "READY":
+            return False
+        key = (function_name, qualifier)
+        with self._cache_lock:
+            warmed = key in self._warmed
+            self._warmed.add(key)
+        if invocations and not warmed:
+            self.warm_up(function_name, qualifier, invocations, payload)
+        return True
+
+    def wait_for_provisioned_concurrency(self, function_name, qualifier, concurrency, timeout, interval=5,
+                                         invocations=0, payload=b"{}"):
+        """
+        Pre-warm a version or alias and block until its provisioned concurrency is READY. Returns False on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while not self.prewarm(function_name, qualifier, concurrency, invocations, payload):
+            if time.monotonic() + interval > deadline:
+                return False
+            time.sleep(interval)
+        return True
+
+    def warm_up(self, function_name, qualifier, invocations, payload=b"{}", concurrency=PREWARM_CONCURRENCY):
+        """
+        Fire warm-up invocations at a version or alias side by side. Returns how many of them succeeded.
+        """
+        def invoke(_):
+            try:
+                self.invoke_lambda(function_name, payload, qualifier)
+                return True
+            except (BotoCoreError, ClientError):
+                return False
+
+        with ThreadPoolExecutor(max_workers=min(concurrency, invocations), thread_name_prefix="warm-up") as executor:
+            succeeded = sum(executor.map(invoke, range(invocations)))
+        logging.info(f"Warmed up '{function_name}:{qualifier}' with {succeeded}/{invocations} invocations.")
+        return succeeded
@@ -0,0 +1,174 @@
+import base64
+import binascii
+import hashlib
+import json
+import re
+
+from controller.config import CRD_GROUP, CRD_VERSION, LIST_DEFAULT_LIMIT, LIST_MAX_LIMIT
+
+SELECTOR_PATTERN = re.compile(
+    r"^\s*(?:(?P<absent>!)\s*(?P<absent_key>[\w./-]+)"
+    r"|(?P<key>[\w./-]+)\s*(?:(?P<op>==|=|!=)\s*(?P<value>[\w.-]*)"
+    r"|\s+(?P<set_op>in|notin)\s*\((?P<values>[^)]*)\))?)\s*$"
+)
+
+
+def parse_list_query(args):
+    """
+    Parse the limit, continue, functionName, phase, labelSelector and fields query parameters of a list request.
+
+    Raises ValueError when a parameter is malformed.
+    """
+    try:
+        limit = int(args.get('limit', LIST_DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1 or limit > LIST_MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {LIST_MAX_LIMIT}")
+    fields = args.get('fields')
+    return {
+        'limit': limit,
+        'continue': decode_continue(args.get('continue')),
+        'functionName': args.get('functionName') or None,
+        'phase': args.get('phase') or None,
+        'labelSelector': parse_label_selector(args.get('labelSelector')),
+        'fields': [field.strip() for field in fields.split(',') if field.strip()] if fields else None,
+    }
+
+
+def parse_label_selector(selector):
+    """
+    Parse a Kubernetes label selector such as 'team=payments,tier in (web,api),!legacy' into requirements.
+    """
+    requirements = []
+    if not selector:
+        return requirements
+    for clause in re.split(r',(?![^(]*\))', selector):
+        match = SELECTOR_PATTERN.match(clause)
+        if not match:
+            raise ValueError(f"Invalid label selector '{clause.strip()}'")
+        if match.group('absent'):
+            requirements.append((match.group('absent_key'), 'notexists', ()))
+        elif match.group('set_op'):
+            values = tuple(value.strip() for value in match.group('values').split(',') if value.strip())
+            requirements.append((match.group('key'), match.group('set_op'), values))
+        elif match.group('op'):
+            op = '!=' if match.group('op') == '!=' else '='
+            requirements.append((match.group('key'), op, (match.group('value'),)))
+        else:
+            requirements.append((match.group('key'), 'exists', ()))
+    return requirements
+
+
+def match_labels(labels, requirements):
+    """
+    Check whether a label set satisfies every label selector requirement.
+    """
+    for key, op, values in requirements:
+        present = key in labels
+        if op == 'exists' and not present:
+            return False
+        if op == 'notexists' and present:
+            return False
+        if op in ('=', 'in') and (not present or labels[key] not in values):
+            return False
+        if op in ('!=', 'notin') and present and labels[key] in values:
+            return False
+    return True
+
+
+def encode_continue(resource_version, name):
+    """
+    Build an opaque continue token resuming a listing after the given name.
+    """
+    token = json.dumps({'rv': resource_version, 'start': name}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(token.encode()).decode()
+
+
+def decode_continue(token):
+    """
+    Get the name a continue token resumes after.
+    """
+    if not token:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode()))['start']
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError("Invalid continue token")
+
+
+def list_page(store, query):
+    """
+    Get one page of the LambdaCanary objects matching a parsed list query.
+
+    Returns the matching objects, the continue token of the next page or None, and the store's
+    resourceVersion at the time the page was read.
+    """
+    if query['functionName']:
+        candidates, resource_version = store.snapshot(query['continue'], 'functionName', query['functionName'])
+    else:
+        candidates, resource_version = store.snapshot(query['continue'])
+    items = []
+    for obj in candidates:
+        if query['phase'] and (obj.get('status') or {}).get('phase') != query['phase']:
+            continue
+        if not match_labels(obj['metadata'].get('labels') or {}, query['labelSelector']):
+            continue
+        if len(items) == query['limit']:
+            return items, encode_continue(resource_version, items[-1]['metadata']['name']), resource_version
+        items.append(obj)
+    return items, None, resource_version
+
+
+def project(obj, fields):
+    """
+    Keep only the given dotted field paths of an object, such as 'metadata.name' or 'status.phase'.
+    """
+    if not fields:
+        return obj
+    projected = {}
+    for field in fields:
+        keys = field.split('.')
+        value = obj
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = projected
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = value
+    return projected
+
+
+def list_etag(resource_version, args):
+    """
+    Build a weak ETag for a listing from the store's resourceVersion and the query parameters.
+    """
+    query = '&'.join(f"{key}={args.get(key)}" for key in sorted(args.keys()))
+    digest = hashlib.sha1(f"{resource_version}?{query}".encode()).hexdigest()[:16]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Check whether an If-None-Match header covers the given ETag.
+    """
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates or etag[2:] in candidates
+
+
+def iter_list(items, fields, resource_version, continue_token):
+    """
+    Serialize a page of LambdaCanary objects as a Kubernetes-style list, one object at a time.
+    """
+    metadata = {'resourceVersion': resource_version}
+    if continue_token:
+        metadata['continue'] = continue_token
+    yield f'{{"apiVersion":"{CRD_GROUP}/{CRD_VERSION}","kind":"LambdaCanaryList","items":['
+    for i, obj in enumerate(items):
+        yield (',' if i else '') + json.dumps(project(obj, fields), separators=(',', ':'))
+    yield '],"metadata":' + json.dumps(metadata, separators=(',', ':')) + '}'
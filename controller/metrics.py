@@ -1,13 +1,16 @@
-import boto3
 import logging
 
 from botocore.exceptions import ClientError
 
+from controller.aws import get_client_factory
+from controller.telemetry import AWS_CALL_SECONDS, timed
+
 
 class CloudWatchClient:
-    def __init__(self, region_name):
-        self._client = boto3.client("cloudwatch", region_name=region_name)
+    def __init__(self, region_name, client_factory=None):
+        self._client = (client_factory or get_client_factory()).client("cloudwatch", region_name)
 
+    @timed(AWS_CALL_SECONDS, "cloudwatch", "get_metric_statistics")
     def get_metric_statistics(self, function_name, start_time, end_time):
         """
         Get the average and maximum invocation latency of a Lambda function for a specified time period.
@@ -41,4 +44,147 @@ class CloudWatchClient:
             }
         except ClientError as e:
             logging.error(f"Could not get metric statistics for '{function_name}': {e.response['Error']['Message']}.")
-            raise e
\ No newline at end of file
+            raise e
+
+LAMBDA_METRIC_QUERIES = (
+    ("duration_avg", "Duration", "Average"),
+    ("duration_p95", "Duration", "p95"),
+    ("duration_p99", "Duration", "p99"),
+    ("errors", "Errors", "Sum"),
+    ("invocations", "Invocations", "Sum"),
+    ("throttles", "Throttles", "Sum"),
+)
+MAX_QUERIES_PER_REQUEST = 500
+RETRYABLE_ERROR_CODES = frozenset((
+    "Throttling",
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "LimitExceededException",
+))
+
+
+def is_retryable(error):
+    """
+    Check whether a CloudWatch error is a throttling or server-side error worth retrying on a later tick.
+    """
+    if error.response.get("Error", {}).get("Code") in RETRYABLE_ERROR_CODES:
+        return True
+    return error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0) >= 500
+
+
+class BatchMetricsFetcher:
+    def __init__(self, region_name, max_calls_per_tick=10, period=60, client_factory=None):
+        self._client = (client_factory or get_client_factory()).client("cloudwatch", region_name)
+        self._max_calls_per_tick = max_calls_per_tick
+        self._period = period
+        self._cursor = 0
+
+    def fetch(self, targets, start_time, end_time):
+        """
+        Get the Lambda metric time series of many function:alias pairs with as few GetMetricData calls as possible.
+
+        Targets are (function_name, qualifier) pairs, optionally followed by an executed version to split
+        an alias's metrics per version. Returns a tuple of the series keyed by target and the targets that did not fit
+        into this tick's call budget. Targets are rotated between ticks so every canary is eventually served.
+        Throttled and server-side errors defer their chunk to a later tick; any other error is raised.
+        """
+        targets = list(dict.fromkeys(targets))
+        if not targets:
+            return {}, []
+        offset = self._cursor % len(targets)
+        targets = targets[offset:] + targets[:offset]
+        per_chunk = MAX_QUERIES_PER_REQUEST // len(LAMBDA_METRIC_QUERIES)
+        chunks = [targets[i:i + per_chunk] for i in range(0, len(targets), per_chunk)]
+        series = {}
+        deferred = []
+        calls = 0
+        for chunk in chunks:
+            if calls >= self._max_calls_per_tick:
+                deferred.extend(chunk)
+                continue
+            try:
+                chunk_series, chunk_calls, complete = self._fetch_chunk(
+                    chunk, start_time, end_time, self._max_calls_per_tick - calls
+                )
+            except ClientError as e:
+                if not is_retryable(e):
+                    raise
+                calls += 1
+                deferred.extend(chunk)
+                continue
+            calls += chunk_calls
+            if complete:
+                series.update(chunk_series)
+            else:
+                deferred.extend(chunk)
+        self._cursor = offset + len(targets) - len(deferred)
+        if deferred:
+            logging.warning(f"Metric budget of {self._max_calls_per_tick} calls exhausted, deferring {len(deferred)} canaries.")
+        return series, deferred
+
+    @timed(AWS_CALL_SECONDS, "cloudwatch", "get_metric_data")
+    def _fetch_chunk(self, chunk, start_time, end_time, budget):
+        queries = []
+        owners = {}
+        for i, target in enumerate(chunk):
+            function_name, qualifier = target[:2]
+            dimensions = [
+                {
+                    "Name": "FunctionName",
+                    "Value": function_name
+                },
+                {
+                    "Name": "Resource",
+                    "Value": f"{function_name}:{qualifier}"
+                }
+            ]
+            if len(target) > 2:
+                dimensions.append({
+                    "Name": "ExecutedVersion",
+                    "Value": target[2]
+                })
+            for j, (key, metric_name, stat) in enumerate(LAMBDA_METRIC_QUERIES):
+                query_id = f"m{i}_{j}"
+                owners[query_id] = (target, key)
+                queries.append({
+                    "Id": query_id,
+                    "MetricStat": {
+                        "Metric": {
+                            "Namespace": "AWS/Lambda",
+                            "MetricName": metric_name,
+                            "Dimensions": dimensions
+                        },
+                        "Period": self._period,
+                        "Stat": stat
+                    },
+                    "ReturnData": True
+                })
+        series = {target: {key: [] for key, _, _ in LAMBDA_METRIC_QUERIES} for target in chunk}
+        kwargs = {
+            "MetricDataQueries": queries,
+            "StartTime": start_time,
+            "EndTime": end_time,
+            "ScanBy": "TimestampAscending"
+        }
+        calls = 0
+        try:
+            while True:
+                if calls >= budget:
+                    return series, calls, False
+                response = self._client.get_metric_data(**kwargs)
+                calls += 1
+                for result in response.get("MetricDataResults", []):
+                    target, key = owners[result["Id"]]
+                    series[target][key].extend(zip(result.get("Timestamps", []), result.get("Values", [])))
+                next_token = response.get("NextToken")
+                if not next_token:
+                    break
+                kwargs["NextToken"] = next_token
+        except ClientError as e:
+            logging.error(f"Could not get metric data for {len(chunk)} canaries: {e.response['Error']['Message']}.")
+            raise e
+        for target_series in series.values():
+            for points in target_series.values():
+                points.sort(key=lambda point: point[0])
+        return series, calls, True
@@ -1,8 +1,58 @@
 class CanaryPolicy:
-    def __init__(self, step, threshold, cooldown):
+    __slots__ = ('_step', '_threshold', '_cooldown', '_prewarm', '_probe')
+
+    def __init__(self, step, threshold, cooldown, prewarm=None, probe=None):
         self._step = step
         self._threshold = threshold
         self._cooldown = cooldown
+        self._prewarm = prewarm
+        self._probe = probe
+
+    @classmethod
+    def from_dict(cls, policy):
+        """
+        Build a CanaryPolicy from the policy of a LambdaCanary spec.
+        """
+        return cls(policy['step'], policy['threshold'], policy['cooldown'], policy.get('prewarm'), policy.get('probe'))
+
+    def to_dict(self):
+        """
+        Serialize the policy as it appears in a LambdaCanary spec.
+        """
+        policy = {'step': self._step, 'threshold': self._threshold, 'cooldown': self._cooldown}
+        if self._prewarm is not None:
+            policy['prewarm'] = dict(self._prewarm)
+        if self._probe is not None:
+            policy['probe'] = dict(self._probe)
+        return policy
+
+    @property
+    def step(self):
+        """
+        Get the percentage of traffic added to the canary version per step.
+        """
+        return self._step
+
+    @property
+    def threshold(self):
+        """
+        Get the error rate at or above which the canary version is rolled back.
+        """
+        return self._threshold
+
+    @property
+    def prewarm(self):
+        """
+        Get the pre-warming settings of the canary version, or None.
+        """
+        return self._prewarm
+
+    @property
+    def probe(self):
+        """
+        Get the synthetic probe settings gating the first traffic step of every wave, or None.
+        """
+        return self._probe
 
     def calculate_traffic_percentage(self, error_count, request_count):
         """
@@ -20,4 +70,12 @@ class CanaryPolicy:
         """
         Get the duration of the cooldown period for the canary deployment.
         """
-        return self._cooldown
\ No newline at end of file
+        return self._cooldown
+
+    def __eq__(self, other):
+        if not isinstance(other, CanaryPolicy):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"CanaryPolicy(step={self._step}, threshold={self._threshold}, cooldown={self._cooldown})"
@@ -0,0 +1,144 @@
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from controller.config import (
+    PROBE_CONCURRENCY,
+    PROBE_INVOCATIONS,
+    PROBE_MAX_ERROR_RATE_DELTA,
+    PROBE_MAX_LATENCY_RATIO,
+    PROBE_RATE,
+)
+
+SUB_BUCKETS = 128
+HALF_SUB_BUCKETS = SUB_BUCKETS // 2
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = [0] * SUB_BUCKETS
+        self.count = 0
+        self.errors = 0
+
+    def record(self, seconds, ok=True):
+        """
+        Record the latency of one invocation with a relative precision of 1/64, like an HdrHistogram.
+        """
+        index = bucket_index(max(1, int(seconds * 1000000)))
+        with self._lock:
+            if index >= len(self._counts):
+                self._counts.extend([0] * (index + 1 - len(self._counts)))
+            self._counts[index] += 1
+            self.count += 1
+            if not ok:
+                self.errors += 1
+
+    def percentile(self, percent):
+        """
+        Get the latency in milliseconds at or below which the given percentage of invocations completed.
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            target = max(1, math.ceil(percent / 100 * self.count))
+            seen = 0
+            for index, count in enumerate(self._counts):
+                seen += count
+                if seen >= target:
+                    return bucket_value(index) / 1000
+        return None
+
+    def summary(self):
+        """
+        Summarize the recorded invocations.
+        """
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "error_rate": self.errors / self.count if self.count else 0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+def bucket_index(value):
+    """
+    Map a latency in microseconds onto a log-linear bucket.
+    """
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - 7
+    return SUB_BUCKETS + (shift - 1) * HALF_SUB_BUCKETS + (value >> shift) - HALF_SUB_BUCKETS
+
+
+def bucket_value(index):
+    """
+    Get the highest latency in microseconds that falls into a bucket.
+    """
+    if index < SUB_BUCKETS:
+        return index
+    shift = (index - SUB_BUCKETS) // HALF_SUB_BUCKETS + 1
+    sub_bucket = (index - SUB_BUCKETS) % HALF_SUB_BUCKETS + HALF_SUB_BUCKETS
+    return ((sub_bucket + 1) << shift) - 1
+
+
+class ProbeEngine:
+    def __init__(self, lambda_client, concurrency=PROBE_CONCURRENCY, rate=PROBE_RATE):
+        self._lambda_client = lambda_client
+        self._concurrency = concurrency
+        self._rate = rate
+
+    def probe(self, function_name, canary_qualifier, stable_qualifier, invocations=PROBE_INVOCATIONS, payload=b"{}"):
+        """
+        Fire synthetic invocations at the canary and stable qualifiers side by side and compare their latencies.
+
+        Invocations alternate between the two qualifiers and are paced to the configured rate, so both
+        see the same conditions.
+        """
+        histograms = {"canary": LatencyHistogram(), "stable": LatencyHistogram()}
+        qualifiers = {"canary": canary_qualifier, "stable": stable_qualifier}
+        started = time.monotonic()
+
+        def invoke(i):
+            side = "canary" if i % 2 == 0 else "stable"
+            delay = started + i / self._rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            invoked = time.perf_counter()
+            ok = self._lambda_client.probe_lambda(function_name, qualifiers[side], payload)
+            histograms[side].record(time.perf_counter() - invoked, ok)
+
+        with ThreadPoolExecutor(max_workers=self._concurrency, thread_name_prefix="probe") as executor:
+            list(executor.map(invoke, range(2 * invocations)))
+        result = {side: histogram.summary() for side, histogram in histograms.items()}
+        logging.info(f"Probed '{function_name}': canary {result['canary']}, stable {result['stable']}.")
+        return result
+
+    def run_health_check(self, function_name, canary_qualifier, stable_qualifier, invocations=PROBE_INVOCATIONS,
+                         payload=b"{}"):
+        """
+        Probe the canary and stable qualifiers and gate on the result.
+
+        Returns whether the canary passed and the side-by-side probe result.
+        """
+        result = self.probe(function_name, canary_qualifier, stable_qualifier, invocations, payload)
+        return is_probe_healthy(result), result
+
+
+def is_probe_healthy(result, max_latency_ratio=PROBE_MAX_LATENCY_RATIO, max_error_rate_delta=PROBE_MAX_ERROR_RATE_DELTA):
+    """
+    Determine whether the canary's probe results are close enough to the stable version's to proceed.
+    """
+    canary = result["canary"]
+    stable = result["stable"]
+    if not canary["count"]:
+        return False
+    if canary["error_rate"] - stable["error_rate"] > max_error_rate_delta:
+        return False
+    if canary["p99"] is not None and stable["p99"] and canary["p99"] > stable["p99"] * max_latency_ratio:
+        return False
+    return True
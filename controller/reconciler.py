@@ -0,0 +1,645 @@
+import importlib
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from botocore.exceptions import BotoCoreError, ClientError
+
+from controller.analysis import CONTINUE, PROMOTE, ROLLBACK, CanaryAnalysis
+from controller.config import (
+    ANALYSIS_SETTLE_MINUTES,
+    ANALYSIS_WINDOW_MINUTES,
+    EVALUATION_INTERVAL,
+    EVALUATION_WINDOW_MINUTES,
+    PREWARM_POLL_INTERVAL,
+    PREWARM_TIMEOUT,
+    PROBE_INVOCATIONS,
+    RECONCILE_BURST,
+    RECONCILE_QPS,
+    RECONCILE_QUEUE_DEPTH,
+    RECONCILE_WORKERS,
+    ROLLBACK_MIN_INVOCATIONS,
+    SCHEDULER_SLACK,
+)
+from controller.policy import CanaryPolicy
+from controller.probe import ProbeEngine
+from controller.regions import RegionalClients
+from controller.scheduler import DeadlineScheduler
+from controller.spec import CanarySpec
+from controller.telemetry import (
+    EVALUATION_SECONDS,
+    RECONCILE_SECONDS,
+    RECOVERED_CANARIES,
+    RECOVERY_SECONDS,
+    ROLLOUT_STEP_SECONDS,
+    SHARD_OWNED_CANARIES,
+    timed,
+)
+from controller.utils import find_rollbacks, format_time, parse_time
+from controller.workqueue import WorkerPool, WorkQueue
+
+get_provisioned_concurrency_size = importlib.import_module('controller.lambda').get_provisioned_concurrency_size
+
+TERMINAL_PHASES = ('Promoted', 'RolledBack')
+
+_step_timers = {action: ROLLOUT_STEP_SECONDS.labels(action) for action in ('advance', 'promote', 'rollback', 'hold')}
+
+
+def get_alias_name(canary):
+    """
+    Get the name of the alias a canary deployment shifts traffic on.
+    """
+    return canary.get('alias', 'release')
+
+
+def get_baseline_key(name):
+    """
+    Get the metric window key holding the stable version's metrics of a canary deployment.
+    """
+    return f"{name}@baseline"
+
+
+def get_window_key(name, region):
+    """
+    Get the metric window key holding a canary deployment's new version metrics in one region.
+    """
+    return name if region is None else f"{name}/{region}"
+
+
+def get_window_keys(name, waves):
+    """
+    Get the metric window keys of both versions of a canary deployment in every region it rolls out to.
+    """
+    keys = []
+    for regions in waves:
+        for region in regions:
+            key = get_window_key(name, region)
+            keys.extend((key, get_baseline_key(key)))
+    return keys
+
+
+def get_waves(canary):
+    """
+    Get the regions of a canary deployment grouped into the waves they roll out in.
+
+    A spec with 'waves' lists them explicitly, one with only 'regions' rolls out one region per wave,
+    and one with neither rolls out in the controller's own region, written as None.
+    """
+    if canary.get('waves'):
+        return [list(regions) for regions in canary['waves']]
+    if canary.get('regions'):
+        return [[region] for region in canary['regions']]
+    return [[None]]
+
+
+def get_region_weights(waves, wave, weight):
+    """
+    Get the canary weight of every region: finished waves are fully shifted, later ones not at all.
+    """
+    weights = {}
+    for i, regions in enumerate(waves):
+        for region in regions:
+            weights[region] = 100 if i < wave else weight if i == wave else 0
+    return weights
+
+
+def get_spec(canary):
+    """
+    Get the parts of a canary deployment that decide how it rolls out, for detecting spec changes.
+    """
+    return CanarySpec.from_dict(canary)
+
+
+def get_prewarm(canary):
+    """
+    Get the pre-warming settings of a canary deployment, or None when its new version cannot be pre-warmed.
+
+    Provisioned concurrency cannot be allocated on $LATEST, so such canaries shift traffic without it.
+    """
+    if canary['newVersion'] == '$LATEST':
+        return None
+    return canary['policy'].get('prewarm')
+
+
+def get_policy(canary):
+    """
+    Build the CanaryPolicy of a canary deployment.
+    """
+    return CanaryPolicy.from_dict(canary['policy'])
+
+
+class CanaryReconciler:
+    def __init__(self, informer, lambda_client, metrics_fetcher, window_store, status_writer=None, shard=None,
+                 analysis=None, scheduler=None, journal=None, workers=RECONCILE_WORKERS, max_depth=RECONCILE_QUEUE_DEPTH,
+                 qps=RECONCILE_QPS, burst=RECONCILE_BURST, slack=SCHEDULER_SLACK, regions=None):
+        self._store = informer.store
+        self._regions = regions if regions is not None else RegionalClients(lambda_client, metrics_fetcher)
+        if window_store.window_minutes < 2 * ANALYSIS_WINDOW_MINUTES:
+            raise ValueError(
+                f"Metric windows hold {window_store.window_minutes} minutes, "
+                f"the analysis needs {2 * ANALYSIS_WINDOW_MINUTES}"
+            )
+        self._window_store = window_store
+        self._status_writer = status_writer
+        self._shard = shard
+        self._analysis = analysis or CanaryAnalysis()
+        self._scheduler = scheduler if scheduler is not None else DeadlineScheduler()
+        self._slack = slack
+        self._journal = journal
+        self.recovery = None
+        self._queue = WorkQueue(max_depth=max_depth, qps=qps, burst=burst)
+        self._pool = WorkerPool(self._queue, self.reconcile, workers)
+        self._lock = threading.Lock()
+        self._verdicts = {}
+        self._weights = {}
+        self._waves = {}
+        self._rolled_back = set()
+        self._specs = {}
+        self._prewarming = {}
+        self._stopped = threading.Event()
+        informer.add_handler(self._on_event)
+        if shard is not None:
+            shard.add_handler(lambda members: self.resync())
+
+    def start(self, evaluate=True):
+        """
+        Schedule the canaries already in the store and start the reconcile workers and the evaluation loop.
+
+        Callers that drive tick() themselves pass evaluate=False.
+        """
+        SHARD_OWNED_CANARIES.set_function(lambda: sum(1 for canary in self._store.list() if self.owns(canary)))
+        if self._journal is not None:
+            self.recover()
+        self.resync()
+        self._pool.start()
+        if evaluate:
+            threading.Thread(target=self._run, name='canary-evaluator', daemon=True).start()
+
+    def stop(self):
+        """
+        Stop the evaluation loop and the reconcile workers.
+        """
+        self._stopped.set()
+        self._scheduler.close()
+        self._pool.stop()
+
+    def wait_idle(self, timeout=None):
+        """
+        Block until every queued canary has been reconciled. Returns False on timeout.
+        """
+        return self._queue.wait_idle(timeout)
+
+    @timed(EVALUATION_SECONDS)
+    def tick(self, now=None):
+        """
+        Pull new metrics for the canaries whose cooldown has ended, evaluate them in one pass and queue
+        them for a step.
+
+        Canaries that are still cooling down are neither fetched nor evaluated. A multi-region canary is
+        fetched in every region it has shifted traffic in so far, with one batched pass per region running
+        side by side, and its verdict aggregates them: any region rolling back rolls the canary back and
+        promotion needs every region of the current wave to agree. If the evaluation fails, the due
+        canaries are tried again after the evaluation interval.
+        """
+        now = now or datetime.now(timezone.utc)
+        canaries = {}
+        for name in self._scheduler.due(self._slack):
+            canary = self._store.get(name)
+            if canary is not None and self.owns(canary):
+                canaries[name] = canary
+        if not canaries:
+            return
+        try:
+            self._evaluate(canaries, now)
+        except Exception:
+            for name in canaries:
+                self._scheduler.schedule(name, EVALUATION_INTERVAL)
+            raise
+
+    def _evaluate(self, canaries, now):
+        lookback = max(
+            [2 * EVALUATION_INTERVAL] + [get_policy(canary).get_cooldown() for canary in canaries.values()]
+        )
+        lookback = min(lookback, ANALYSIS_WINDOW_MINUTES * 60)
+        targets = {}
+        owners = {}
+        region_keys = {}
+        shifted_keys = {}
+        for name, canary in canaries.items():
+            function_name = canary['functionName']
+            alias_name = get_alias_name(canary)
+            waves, wave = self._current_wave(name, canary)
+            region_keys[name] = []
+            shifted_keys[name] = []
+            for i, regions in enumerate(waves[:wave + 1]):
+                for region in regions:
+                    key = get_window_key(name, region)
+                    targets[(region, function_name, alias_name, canary['newVersion'])] = key
+                    targets[(region, function_name, alias_name, canary['oldVersion'])] = get_baseline_key(key)
+                    owners[key] = owners[get_baseline_key(key)] = name
+                    (region_keys if i == wave else shifted_keys)[name].append(key)
+        series, deferred = self._fetch(list(targets), now - timedelta(seconds=lookback), now)
+        for target, target_series in series.items():
+            self._window_store.merge(targets[target], target_series)
+        for target in deferred:
+            name = owners[targets[target]]
+            if canaries.pop(name, None) is not None:
+                self._scheduler.schedule(name, EVALUATION_INTERVAL)
+        keys = [key for key, name in owners.items() if name in canaries]
+        evaluation = self._window_store.evaluate(now, EVALUATION_WINDOW_MINUTES, keys)
+        self._window_store.accumulate(now, keys, ANALYSIS_SETTLE_MINUTES)
+        names = evaluation['names']
+        rows = {name: i for i, name in enumerate(names)}
+        thresholds = np.array([
+            np.inf if key.endswith('@baseline') else get_policy(canaries[owners[key]]).threshold for key in names
+        ])
+        rollbacks = find_rollbacks(evaluation, thresholds, ROLLBACK_MIN_INVOCATIONS)
+        verdicts = {}
+        for name in canaries:
+            if any(key not in rows for key in region_keys[name]):
+                self._scheduler.schedule(name, EVALUATION_INTERVAL)
+                continue
+            monitored = region_keys[name] + [key for key in shifted_keys[name] if key in rows]
+            analyses = {}
+            for key in monitored:
+                analyses[key], _ = self._analysis.analyze(
+                    self._analysis_samples(key, now),
+                    self._analysis_samples(get_baseline_key(key), now)
+                )
+            if ROLLBACK in analyses.values():
+                analysis = ROLLBACK
+            elif all(analyses[key] == PROMOTE for key in region_keys[name]):
+                analysis = PROMOTE
+            else:
+                analysis = CONTINUE
+            verdicts[name] = {
+                'rollback': any(bool(rollbacks[rows[key]]) for key in monitored),
+                'analysis': analysis,
+                'errors': sum(float(evaluation['errors'][rows[key]]) for key in region_keys[name]),
+                'invocations': sum(float(evaluation['invocations'][rows[key]]) for key in region_keys[name]),
+            }
+        with self._lock:
+            self._verdicts.update(verdicts)
+        for name in verdicts:
+            if not self._queue.add(name):
+                with self._lock:
+                    self._verdicts.pop(name, None)
+                self._scheduler.schedule(name, EVALUATION_INTERVAL)
+
+    def _fetch(self, targets, start_time, end_time):
+        by_region = {}
+        for target in targets:
+            by_region.setdefault(target[0], []).append(target[1:])
+
+        def fetch(region):
+            return self._regions.metrics_fetcher(region).fetch(by_region[region], start_time, end_time)
+
+        series = {}
+        deferred = []
+        for region, (region_series, region_deferred) in self._regions.map(fetch, by_region).items():
+            series.update({(region,) + target: target_series for target, target_series in region_series.items()})
+            deferred.extend((region,) + target for target in region_deferred)
+        return series, deferred
+
+    def _current_wave(self, name, canary):
+        waves = get_waves(canary)
+        with self._lock:
+            wave = self._waves.get(name, (canary.get('status') or {}).get('currentWave', 0))
+        return waves, min(wave, len(waves) - 1)
+
+    def _analysis_samples(self, key, now):
+        totals = self._window_store.totals(key)
+        latencies = self._window_store.samples(key, now, ANALYSIS_WINDOW_MINUTES, 'duration_p95')
+        return {
+            'invocations': totals['invocations'],
+            'errors': totals['errors'],
+            'latencies': [latency for latency in latencies if latency > 0],
+        }
+
+    def owns(self, canary):
+        """
+        Check whether this controller replica is responsible for a canary deployment.
+        """
+        if self._shard is None:
+            return True
+        metadata = canary['metadata']
+        return self._shard.owns(metadata.get('namespace', ''), metadata['name'])
+
+    def recover(self):
+        """
+        Resume the rollouts recorded in the journal where they stopped: weight, alias state, metric windows
+        and the time of the last step, without calling AWS.
+
+        Records of canaries that are gone, changed their spec or moved to another replica are dropped.
+        While the replica set has not been read yet, records of canaries this replica does not own are kept.
+        Returns how many rollouts were resumed.
+        """
+        started = time.perf_counter()
+        resumed = 0
+        for name, record in self._journal.replay().items():
+            canary = self._store.get(name)
+            if canary is not None and not self.owns(canary) and not self._shard.has_synced():
+                continue
+            if canary is None or not self.owns(canary) or get_spec(canary).to_dict() != record.get('spec'):
+                self._journal.forget(name)
+                continue
+            with self._lock:
+                self._weights[name] = record['weight']
+                self._waves[name] = record.get('wave', 0)
+            for region, alias in (record.get('aliases') or {}).items():
+                if alias:
+                    self._regions.lambda_client(region or None).restore_alias(
+                        canary['functionName'], get_alias_name(canary), alias
+                    )
+            for key, exported in (record.get('windows') or {}).items():
+                if exported:
+                    self._window_store.restore(key, exported)
+            cooldown = get_policy(canary).get_cooldown()
+            self._scheduler.schedule(name, min(max(cooldown - (time.time() - record['steppedAt']), 0), cooldown))
+            resumed += 1
+        elapsed = time.perf_counter() - started
+        RECOVERY_SECONDS.set(elapsed)
+        RECOVERED_CANARIES.set(resumed)
+        self.recovery = {'canaries': resumed, 'seconds': round(elapsed, 3)}
+        logging.info(f"Resumed {resumed} rollouts from the journal in {elapsed:.3f}s.")
+        return resumed
+
+    def resync(self):
+        """
+        Schedule every canary this replica owns and clean up the others, e.g. after ownership moved
+        between replicas.
+        """
+        for canary in self._store.list():
+            name = canary['metadata']['name']
+            if self.owns(canary):
+                if name not in self._scheduler:
+                    self._schedule(canary)
+            elif self._reset(name) or name in self._scheduler:
+                self._scheduler.cancel(name)
+                self._queue_cleanup(name)
+
+    @timed(RECONCILE_SECONDS)
+    def reconcile(self, name):
+        """
+        Apply the latest evaluation of a canary deployment to the traffic weights of its Lambda alias.
+
+        A multi-region canary shifts every region of its current wave side by side and moves on to the
+        next wave once they are fully shifted. With a probe policy, the first step of every wave waits for
+        a synthetic probe of the new version against the old one, and a failed probe rolls the canary back. A rollback reverts every region shifted so far and halts
+        the later waves.
+        """
+        canary = self._store.get(name)
+        if canary is None or not self.owns(canary):
+            self._reset(name)
+            with self._lock:
+                spec = self._specs.pop(name, None)
+            waves = get_waves(spec.to_dict()) if spec is not None else [[None]]
+            if canary is None and spec is not None and get_prewarm(spec.to_dict()):
+                self._release(
+                    name, spec.function_name, spec.new_version, [region for regions in waves for region in regions]
+                )
+            if self._journal is not None:
+                self._journal.forget(name)
+            self._scheduler.cancel(name)
+            for key in get_window_keys(name, waves):
+                self._window_store.remove(key)
+            if self._status_writer:
+                self._status_writer.forget(name)
+            return
+        status = canary.get('status') or {}
+        waves = get_waves(canary)
+        with self._lock:
+            verdict = self._verdicts.pop(name, None)
+            weight = self._weights.get(name, status.get('currentWeight', 0))
+            wave = min(self._waves.get(name, status.get('currentWave', 0)), len(waves) - 1)
+            if name not in self._weights and status.get('phase') == 'RolledBack':
+                self._rolled_back.add(name)
+            rolled_back = name in self._rolled_back
+        if verdict is None:
+            return
+        if rolled_back:
+            self._scheduler.cancel(name)
+            return
+        self._scheduler.schedule(name, EVALUATION_INTERVAL)
+        function_name = canary['functionName']
+        alias_name = get_alias_name(canary)
+        prewarm = get_prewarm(canary)
+        regions = waves[wave]
+        current_weight = weight
+        rollback = verdict['rollback'] or verdict['analysis'] == ROLLBACK
+        action = 'hold'
+        if rollback:
+            logging.warning(f"Rolling back canary '{name}' of '{function_name}'.")
+            action = 'rollback'
+            weight = 0
+        elif weight < 100 and verdict['analysis'] == PROMOTE:
+            logging.info(f"Analysis promotes canary '{name}' of '{function_name}'.")
+            action = 'promote'
+            weight = 100
+        elif weight < 100:
+            policy = get_policy(canary)
+            if weight == 0:
+                step = policy.step
+            else:
+                step = policy.calculate_traffic_percentage(verdict['errors'], verdict['invocations'])
+            if step:
+                weight = min(100, weight + step)
+                action = 'promote' if weight >= 100 else 'advance'
+        if prewarm and action == 'advance' and not self._prewarm(name, canary, prewarm, weight, regions):
+            self._scheduler.schedule(name, PREWARM_POLL_INTERVAL)
+            if self._status_writer:
+                self._status_writer.update(name, phase='Prewarming', currentWeight=current_weight)
+            return
+        probe = get_policy(canary).probe
+        if probe is not None and not rollback and current_weight == 0 and weight > 0:
+            if not self._probe(name, canary, probe, regions):
+                logging.warning(f"Synthetic probe of canary '{name}' failed, rolling back '{function_name}'.")
+                rollback = True
+                action = 'rollback'
+                weight = 0
+        shifted = [region for wave_regions in waves[:wave + 1] for region in wave_regions]
+        started = time.perf_counter()
+        self._regions.map(
+            lambda region: self._regions.lambda_client(region).shift_traffic(
+                function_name, alias_name, canary['oldVersion'], canary['newVersion'], weight
+            ),
+            shifted if rollback else regions
+        )
+        _step_timers[action].observe(time.perf_counter() - started)
+        if not rollback and weight >= 100 and wave + 1 < len(waves):
+            logging.info(f"Canary '{name}' of '{function_name}' finished wave {wave + 1} of {len(waves)}.")
+            if prewarm:
+                self._release(name, function_name, canary['newVersion'], regions)
+            wave += 1
+            weight = 0
+        with self._lock:
+            self._weights[name] = weight
+            self._waves[name] = wave
+            if rollback:
+                self._rolled_back.add(name)
+        if rollback:
+            phase = 'RolledBack'
+        elif weight >= 100:
+            phase = 'Promoted'
+        else:
+            phase = 'Progressing'
+        if rollback or weight >= 100:
+            self._scheduler.cancel(name)
+            if prewarm:
+                self._release(name, function_name, canary['newVersion'], shifted if rollback else regions)
+        else:
+            self._scheduler.schedule(name, get_policy(canary).get_cooldown())
+        if self._journal is not None:
+            if phase == 'Progressing':
+                self._journal.record(
+                    name,
+                    spec=get_spec(canary).to_dict(),
+                    weight=weight,
+                    wave=wave,
+                    phase=phase,
+                    steppedAt=time.time(),
+                    aliases={
+                        region or '': self._regions.lambda_client(region).export_alias(function_name, alias_name)
+                        for region in shifted
+                    },
+                    windows={key: self._window_store.export(key) for key in get_window_keys(name, waves[:wave + 1])}
+                )
+            else:
+                self._journal.forget(name)
+        if self._status_writer:
+            invocations = verdict['invocations']
+            fields = {}
+            if len(waves) > 1 or waves[0] != [None]:
+                fields['currentWave'] = wave
+                fields['regions'] = get_region_weights(waves, len(waves) if phase == 'Promoted' else wave, weight)
+                if rollback:
+                    fields['regions'] = dict.fromkeys(fields['regions'], 0)
+            self._status_writer.update(
+                name,
+                phase=phase,
+                currentWeight=weight,
+                analysis=verdict['analysis'],
+                errorRate=round(verdict['errors'] / invocations, 6) if invocations else 0,
+                lastEvaluation=format_time(time.time()),
+                **fields
+            )
+
+    def _prewarm(self, name, canary, settings, weight, regions):
+        function_name = canary['functionName']
+        concurrency = get_provisioned_concurrency_size(settings['concurrency'], weight)
+        with self._lock:
+            started = self._prewarming.setdefault(name, time.monotonic())
+
+        def prewarm(region):
+            try:
+                return self._regions.lambda_client(region).prewarm(
+                    function_name, canary['newVersion'], concurrency, settings.get('invocations', 0)
+                )
+            except (RuntimeError, BotoCoreError, ClientError) as e:
+                logging.warning(f"Could not pre-warm canary '{name}': {e}, shifting traffic without pre-warming.")
+                return True
+
+        ready = all(self._regions.map(prewarm, regions).values())
+        if not ready and time.monotonic() - started > PREWARM_TIMEOUT:
+            logging.warning(f"Canary '{name}' not pre-warmed after {PREWARM_TIMEOUT}s, shifting traffic anyway.")
+            ready = True
+        if ready:
+            with self._lock:
+                self._prewarming.pop(name, None)
+        return ready
+
+    def _probe(self, name, canary, settings, regions):
+        def probe(region):
+            healthy, _ = ProbeEngine(self._regions.lambda_client(region)).run_health_check(
+                canary['functionName'], canary['newVersion'], canary['oldVersion'],
+                settings.get('invocations', PROBE_INVOCATIONS)
+            )
+            return healthy
+
+        return all(self._regions.map(probe, regions).values())
+
+    def _release(self, name, function_name, version, regions):
+        def release(region):
+            try:
+                self._regions.lambda_client(region).release_provisioned_concurrency(function_name, version)
+            except ClientError:
+                logging.warning(f"Provisioned concurrency of canary '{name}' was not released.")
+
+        self._regions.map(release, regions)
+
+    def _reset(self, name):
+        with self._lock:
+            held = name in self._weights or name in self._verdicts or name in self._rolled_back
+            self._verdicts.pop(name, None)
+            self._weights.pop(name, None)
+            self._waves.pop(name, None)
+            self._rolled_back.discard(name)
+            self._prewarming.pop(name, None)
+        return held
+
+    def _queue_cleanup(self, name):
+        if not self._queue.add(name):
+            self._queue.add_after(name, EVALUATION_INTERVAL)
+
+    def _schedule(self, canary, spec_changed=False):
+        status = canary.get('status') or {}
+        name = canary['metadata']['name']
+        if status.get('phase') in TERMINAL_PHASES and not spec_changed:
+            self._scheduler.cancel(name)
+            return
+        delay = 0
+        if status.get('lastEvaluation') and not spec_changed:
+            cooldown = get_policy(canary).get_cooldown()
+            delay = min(max(cooldown - (time.time() - parse_time(status['lastEvaluation'])), 0), cooldown)
+        self._scheduler.schedule(name, delay)
+
+    def _on_event(self, event_type, canary):
+        name = canary['metadata']['name']
+        if event_type == 'DELETED':
+            self._queue_cleanup(name)
+            return
+        if not self.owns(canary):
+            if name in self._scheduler:
+                self._scheduler.cancel(name)
+                self._queue_cleanup(name)
+            return
+        spec = get_spec(canary)
+        with self._lock:
+            previous = self._specs.get(name)
+            self._specs[name] = spec
+        if previous is None:
+            if name not in self._scheduler:
+                self._schedule(canary)
+        elif previous != spec:
+            logging.info(f"Spec of canary '{name}' changed, restarting its rollout.")
+            self._restart(name, canary, previous)
+            self._schedule(canary, spec_changed=True)
+
+    def _restart(self, name, canary, previous):
+        self._reset(name)
+        with self._lock:
+            self._weights[name] = 0
+            self._waves[name] = 0
+        if self._journal is not None:
+            self._journal.forget(name)
+        waves = get_waves(canary)
+        for key in set(get_window_keys(name, get_waves(previous.to_dict())) + get_window_keys(name, waves)):
+            self._window_store.remove(key)
+        if self._status_writer:
+            fields = {}
+            if len(waves) > 1 or waves[0] != [None]:
+                fields['currentWave'] = 0
+                fields['regions'] = get_region_weights(waves, 0, 0)
+            self._status_writer.update(name, phase='Progressing', currentWeight=0, **fields)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._scheduler.wait(EVALUATION_INTERVAL)
+            if self._stopped.is_set():
+                return
+            try:
+                self.tick()
+            except Exception as e:
+                logging.error(f"Canary evaluation failed: {e}.")
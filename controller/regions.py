@@ -0,0 +1,55 @@
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from controller.config import METRICS_CALLS_PER_TICK, REGION_CONCURRENCY
+
+
+class RegionalClients:
+    def __init__(self, lambda_client, metrics_fetcher, client_factory=None, max_calls_per_tick=METRICS_CALLS_PER_TICK,
+                 concurrency=REGION_CONCURRENCY):
+        self._lock = threading.Lock()
+        self._client_factory = client_factory
+        self._max_calls_per_tick = max_calls_per_tick
+        self._lambda_clients = {None: lambda_client}
+        self._metrics_fetchers = {None: metrics_fetcher}
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='region')
+
+    def lambda_client(self, region_name=None):
+        """
+        Get the LambdaClient of a region, or the controller's own one for None, creating it on first use.
+        """
+        def create():
+            return importlib.import_module('controller.lambda').LambdaClient(region_name, self._client_factory)
+        return self._get(self._lambda_clients, region_name, create)
+
+    def metrics_fetcher(self, region_name=None):
+        """
+        Get the BatchMetricsFetcher of a region, or the controller's own one for None, creating it on first use.
+        """
+        def create():
+            from controller.metrics import BatchMetricsFetcher
+            return BatchMetricsFetcher(region_name, self._max_calls_per_tick, client_factory=self._client_factory)
+        return self._get(self._metrics_fetchers, region_name, create)
+
+    def map(self, func, regions):
+        """
+        Call func with every region side by side and get the results keyed by region.
+
+        Every call runs to completion before the first error, if any, is raised.
+        """
+        regions = list(regions)
+        if len(regions) == 1:
+            return {regions[0]: func(regions[0])}
+        futures = {region: self._executor.submit(func, region) for region in regions}
+        errors = [future.exception() for future in futures.values() if future.exception() is not None]
+        if errors:
+            raise errors[0]
+        return {region: future.result() for region, future in futures.items()}
+
+    def _get(self, clients, region_name, create):
+        with self._lock:
+            client = clients.get(region_name)
+            if client is None:
+                client = clients[region_name] = create()
+            return client
@@ -0,0 +1,110 @@
+import heapq
+import itertools
+import threading
+import time
+
+from controller.telemetry import SCHEDULED_CANARIES, SCHEDULER_LATENESS_SECONDS
+
+
+class DeadlineScheduler:
+    def __init__(self, clock=time.monotonic):
+        self._cond = threading.Condition()
+        self._heap = []
+        self._entries = {}
+        self._sequence = itertools.count()
+        self._clock = clock
+        self._closed = False
+
+    def schedule(self, key, delay):
+        """
+        Make a key due after the given number of seconds, replacing any deadline it already had.
+
+        Deadlines are kept on the monotonic clock, so wall-clock jumps neither fire nor postpone them.
+        """
+        with self._cond:
+            deadline = self._clock() + max(0, delay)
+            sequence = next(self._sequence)
+            self._entries[key] = (deadline, sequence)
+            heapq.heappush(self._heap, (deadline, sequence, key))
+            self._compact()
+            SCHEDULED_CANARIES.set(len(self._entries))
+            self._cond.notify_all()
+
+    def cancel(self, key):
+        """
+        Forget the deadline of a key.
+        """
+        with self._cond:
+            if self._entries.pop(key, None) is not None:
+                self._compact()
+                SCHEDULED_CANARIES.set(len(self._entries))
+
+    def remaining(self, key):
+        """
+        Get the seconds until a key is due, or None if it is not scheduled.
+        """
+        with self._cond:
+            entry = self._entries.get(key)
+            return None if entry is None else entry[0] - self._clock()
+
+    def due(self, slack=0):
+        """
+        Take every key whose deadline has passed or falls within the next slack seconds.
+
+        The slack lets keys that are due a moment apart share one evaluation.
+        """
+        keys = []
+        with self._cond:
+            now = self._clock()
+            while self._heap and self._heap[0][0] <= now + slack:
+                deadline, sequence, key = heapq.heappop(self._heap)
+                if self._entries.get(key) != (deadline, sequence):
+                    continue
+                del self._entries[key]
+                SCHEDULER_LATENESS_SECONDS.observe(max(0, now - deadline))
+                keys.append(key)
+            SCHEDULED_CANARIES.set(len(self._entries))
+        return keys
+
+    def wait(self, timeout=None):
+        """
+        Block until the earliest deadline has passed. Returns False on timeout or once the scheduler is closed.
+        """
+        with self._cond:
+            end = None if timeout is None else self._clock() + timeout
+            while not self._closed:
+                now = self._clock()
+                deadline = self._next_deadline()
+                if deadline is not None and deadline <= now:
+                    return True
+                waits = [limit - now for limit in (deadline, end) if limit is not None]
+                if end is not None and end <= now:
+                    return False
+                self._cond.wait(min(waits) if waits else None)
+            return False
+
+    def close(self):
+        """
+        Wake up and release every waiting thread.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __contains__(self, key):
+        with self._cond:
+            return key in self._entries
+
+    def __len__(self):
+        with self._cond:
+            return len(self._entries)
+
+    def _next_deadline(self):
+        while self._heap and self._entries.get(self._heap[0][2]) != self._heap[0][:2]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def _compact(self):
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(deadline, sequence, key) for key, (deadline, sequence) in self._entries.items()]
+            heapq.heapify(self._heap)
@@ -0,0 +1,180 @@
+import bisect
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+from controller.config import NAMESPACE, POD_NAME, SHARD_LEASE_DURATION, SHARD_RENEW_INTERVAL, SHARD_VIRTUAL_NODES
+from controller.telemetry import KUBERNETES_CALL_SECONDS, SHARD_MEMBERS, timed
+
+LEASE_PREFIX = 'lambda-canary-controller-'
+LEASE_LABEL = 'awesomeapp.com/lambda-canary-shard'
+
+
+def hash_key(value):
+    """
+    Hash a string onto the consistent hash ring.
+    """
+    return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    def __init__(self, members, virtual_nodes=SHARD_VIRTUAL_NODES):
+        points = sorted(
+            (hash_key(f"{member}#{i}"), member) for member in members for i in range(virtual_nodes)
+        )
+        self._hashes = [point[0] for point in points]
+        self._members = [point[1] for point in points]
+        self.members = frozenset(members)
+
+    def owner(self, key):
+        """
+        Get the member that owns a key, or None if the ring is empty.
+        """
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, hash_key(key)) % len(self._hashes)
+        return self._members[index]
+
+
+class ShardCoordinator:
+    def __init__(self, identity=POD_NAME, namespace=NAMESPACE, lease_duration=SHARD_LEASE_DURATION,
+                 renew_interval=SHARD_RENEW_INTERVAL):
+        from kubernetes import client
+        self._api = client.CoordinationV1Api()
+        self._identity = identity
+        self._namespace = namespace
+        self._lease_duration = lease_duration
+        self._renew_interval = renew_interval
+        self._lease_name = f"{LEASE_PREFIX}{identity}"
+        self._observed = {}
+        self._handlers = []
+        self._stopped = threading.Event()
+        self._synced = threading.Event()
+        self._ring = HashRing([])
+        self._renewed = None
+        self._lapsed = False
+
+    def add_handler(self, handler):
+        """
+        Register a callable invoked with the new member set whenever replicas join or leave.
+        """
+        self._handlers.append(handler)
+
+    def owns(self, namespace, name):
+        """
+        Check whether this replica is responsible for reconciling a canary.
+
+        Nothing is owned until the replica's lease is written and the other replicas' leases are read, nor
+        once the lease has not been renewed for a lease duration, since the other replicas then take over.
+        """
+        if not self._renewed_recently():
+            return False
+        return self._ring.owner(f"{namespace}/{name}") == self._identity
+
+    def has_synced(self):
+        """
+        Check whether the replica set has been read successfully at least once.
+        """
+        return self._synced.is_set()
+
+    def start(self):
+        """
+        Renew this replica's lease and read the replica set once, then keep doing so in the background.
+        """
+        self._round()
+        threading.Thread(target=self._run, name='shard-coordinator', daemon=True).start()
+
+    def stop(self):
+        """
+        Stop renewing and delete this replica's lease so its canaries move over immediately.
+        """
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        from kubernetes import client
+        try:
+            self._api.delete_namespaced_lease(self._lease_name, self._namespace)
+        except client.rest.ApiException as e:
+            if e.status != 404:
+                logging.error(f"Could not delete lease '{self._lease_name}': {e.reason}.")
+
+    def _run(self):
+        while not self._stopped.wait(self._renew_interval):
+            self._round()
+
+    def _round(self):
+        from kubernetes import client
+        if self._renewed is not None and not self._renewed_recently():
+            self._lapsed = True
+        try:
+            self._renew()
+            self._refresh()
+        except client.rest.ApiException as e:
+            logging.error(f"Shard coordination failed: {e.reason}.")
+            return
+        except Exception as e:
+            logging.error(f"Shard coordination failed: {e}.")
+            return
+        if self._lapsed:
+            self._lapsed = False
+            logging.info(f"Lease '{self._lease_name}' renewed again, resuming ownership.")
+            for handler in self._handlers:
+                handler(self._ring.members)
+
+    def _renewed_recently(self):
+        return self._renewed is not None and time.monotonic() - self._renewed < self._lease_duration
+
+    @timed(KUBERNETES_CALL_SECONDS, 'renew_lease')
+    def _renew(self):
+        started = time.monotonic()
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+        body = {
+            'metadata': {
+                'name': self._lease_name,
+                'labels': {LEASE_LABEL: 'true'}
+            },
+            'spec': {
+                'holderIdentity': self._identity,
+                'leaseDurationSeconds': self._lease_duration,
+                'renewTime': now
+            }
+        }
+        from kubernetes import client
+        try:
+            self._api.patch_namespaced_lease(self._lease_name, self._namespace, body)
+        except client.rest.ApiException as e:
+            if e.status != 404:
+                raise e
+            body['spec']['acquireTime'] = now
+            self._api.create_namespaced_lease(self._namespace, body)
+            logging.info(f"Lease '{self._lease_name}' created.")
+        self._renewed = started
+
+    @timed(KUBERNETES_CALL_SECONDS, 'list_leases')
+    def _refresh(self):
+        leases = self._api.list_namespaced_lease(self._namespace, label_selector=f"{LEASE_LABEL}=true").items
+        now = time.monotonic()
+        members = {self._identity}
+        observed = {}
+        for lease in leases:
+            holder = lease.spec.holder_identity
+            renew_time = lease.spec.renew_time
+            if not holder or renew_time is None:
+                continue
+            last_seen = self._observed.get(holder)
+            if last_seen is None or last_seen[0] != renew_time:
+                last_seen = (renew_time, now)
+            observed[holder] = last_seen
+            duration = lease.spec.lease_duration_seconds or self._lease_duration
+            if now - last_seen[1] < duration:
+                members.add(holder)
+        self._observed = observed
+        self._synced.set()
+        SHARD_MEMBERS.set(len(members))
+        if members != self._ring.members:
+            logging.info(f"Controller replicas changed to {sorted(members)}.")
+            self._ring = HashRing(members)
+            for handler in self._handlers:
+                handler(members)
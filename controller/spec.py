@@ -0,0 +1,274 @@
+import re
+
+from controller.policy import CanaryPolicy
+
+CANARY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "functionName": {
+            "type": "string",
+            "minLength": 1,
+            "maxLength": 140
+        },
+        "newVersion": {
+            "type": "string",
+            "pattern": r"^(\$LATEST|[0-9]+)$"
+        },
+        "oldVersion": {
+            "type": "string",
+            "pattern": r"^(\$LATEST|[0-9]+)$"
+        },
+        "alias": {
+            "type": "string",
+            "pattern": r"^[a-zA-Z0-9_-]{1,128}$"
+        },
+        "policy": {
+            "type": "object",
+            "properties": {
+                "step": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 100
+                },
+                "threshold": {
+                    "type": "number",
+                    "minimum": 0,
+                    "maximum": 1
+                },
+                "cooldown": {
+                    "type": "integer",
+                    "minimum": 0
+                },
+                "prewarm": {
+                    "type": "object",
+                    "properties": {
+                        "concurrency": {
+                            "type": "integer",
+                            "minimum": 1
+                        },
+                        "invocations": {
+                            "type": "integer",
+                            "minimum": 0
+                        }
+                    },
+                    "required": [
+                        "concurrency"
+                    ]
+                },
+                "probe": {
+                    "type": "object",
+                    "properties": {
+                        "invocations": {
+                            "type": "integer",
+                            "minimum": 1
+                        }
+                    }
+                }
+            },
+            "required": [
+                "step",
+                "threshold",
+                "cooldown"
+            ]
+        },
+        "regions": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "string",
+                "minLength": 1
+            }
+        },
+        "waves": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "array",
+                "minItems": 1,
+                "items": {
+                    "type": "string",
+                    "minLength": 1
+                }
+            }
+        }
+    },
+    "required": [
+        "functionName",
+        "newVersion",
+        "oldVersion",
+        "policy"
+    ]
+}
+
+SCHEMA_TYPES = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "object": dict,
+    "array": list,
+}
+
+
+def compile_schema(schema):
+    """
+    Compile an OpenAPI v3 schema into a function checking a value against it.
+
+    The schema is walked once; the returned function takes a value and a partial flag, which skips
+    the top-level required fields for updates, and returns a list of error messages. Only the type,
+    properties, required, items, minimum, maximum, minLength, maxLength, minItems and pattern
+    keywords are supported.
+    """
+    check = _compile(schema)
+    required = tuple(schema.get("required", ()))
+
+    def validate(value, partial=False):
+        errors = []
+        if not isinstance(value, dict):
+            return ["Request body must be an object"]
+        if not partial:
+            errors.extend(f"'{key}' is required" for key in required if key not in value)
+        check(value, "", errors, False)
+        return errors
+    return validate
+
+
+def _compile(schema):
+    expected = schema.get("type")
+    types = SCHEMA_TYPES.get(expected)
+    minimum = schema.get("minimum")
+    maximum = schema.get("maximum")
+    min_length = schema.get("minLength")
+    max_length = schema.get("maxLength")
+    min_items = schema.get("minItems")
+    pattern = re.compile(schema["pattern"]) if "pattern" in schema else None
+    required = tuple(schema.get("required", ()))
+    properties = {key: _compile(subschema) for key, subschema in schema.get("properties", {}).items()}
+    items = _compile(schema["items"]) if "items" in schema else None
+
+    def check(value, path, errors, check_required=True):
+        if types is not None and (not isinstance(value, types) or isinstance(value, bool) and expected != "boolean"):
+            errors.append(f"'{path}' must be of type {expected}")
+            return
+        if minimum is not None and value < minimum:
+            errors.append(f"'{path}' must be at least {minimum}")
+        if maximum is not None and value > maximum:
+            errors.append(f"'{path}' must be at most {maximum}")
+        if min_length is not None and len(value) < min_length:
+            errors.append(f"'{path}' must be at least {min_length} characters long")
+        if max_length is not None and len(value) > max_length:
+            errors.append(f"'{path}' must be at most {max_length} characters long")
+        if min_items is not None and len(value) < min_items:
+            errors.append(f"'{path}' must have at least {min_items} items")
+        if pattern is not None and not pattern.search(value):
+            errors.append(f"'{path}' must match {pattern.pattern}")
+        if check_required:
+            errors.extend(f"'{path}.{key}' is required" for key in required if key not in value)
+        for key, check_property in properties.items():
+            if key in value:
+                check_property(value[key], f"{path}.{key}" if path else key, errors)
+        if items is not None:
+            for i, item in enumerate(value):
+                items(item, f"{path}[{i}]", errors)
+    return check
+
+
+validate_spec = compile_schema(CANARY_SCHEMA)
+
+
+def merge_spec(current, update):
+    """
+    Apply a partial update to a LambdaCanary object the way a merge-patch does: the given fields replace
+    the current ones, except for the policy, whose fields are merged into the current policy.
+    """
+    spec = dict(current)
+    spec.update(update)
+    if isinstance(current.get('policy'), dict) and isinstance(update.get('policy'), dict):
+        spec['policy'] = dict(current['policy'], **update['policy'])
+    return spec
+
+
+def validate_update(current, update):
+    """
+    Check the spec a partial update would leave a LambdaCanary object with, as merged by merge_spec.
+    """
+    if not isinstance(update, dict):
+        return ["Request body must be an object"]
+    return validate_spec(merge_spec(current, update))
+
+
+class CanarySpec:
+    __slots__ = ('_function_name', '_new_version', '_old_version', '_policy', '_alias', '_regions', '_waves')
+
+    def __init__(self, function_name, new_version, old_version, policy, alias=None, regions=None, waves=None):
+        self._function_name = function_name
+        self._new_version = new_version
+        self._old_version = old_version
+        self._policy = policy
+        self._alias = alias
+        self._regions = tuple(regions) if regions else None
+        self._waves = tuple(tuple(wave) for wave in waves) if waves else None
+
+    @classmethod
+    def from_dict(cls, canary):
+        """
+        Build a CanarySpec from a LambdaCanary object or request body, ignoring its metadata and status.
+        """
+        return cls(
+            canary['functionName'],
+            canary['newVersion'],
+            canary['oldVersion'],
+            CanaryPolicy.from_dict(canary['policy']),
+            canary.get('alias'),
+            canary.get('regions'),
+            canary.get('waves')
+        )
+
+    def to_dict(self):
+        """
+        Serialize the spec as the fields of a LambdaCanary object.
+        """
+        spec = {
+            'functionName': self._function_name,
+            'newVersion': self._new_version,
+            'oldVersion': self._old_version,
+            'policy': self._policy.to_dict(),
+        }
+        if self._alias is not None:
+            spec['alias'] = self._alias
+        if self._regions is not None:
+            spec['regions'] = list(self._regions)
+        if self._waves is not None:
+            spec['waves'] = [list(wave) for wave in self._waves]
+        return spec
+
+    @property
+    def function_name(self):
+        return self._function_name
+
+    @property
+    def new_version(self):
+        return self._new_version
+
+    @property
+    def old_version(self):
+        return self._old_version
+
+    @property
+    def policy(self):
+        return self._policy
+
+    @property
+    def alias(self):
+        """
+        Get the name of the alias the canary shifts traffic on.
+        """
+        return self._alias or 'release'
+
+    def __eq__(self, other):
+        if not isinstance(other, CanarySpec):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"CanarySpec(function_name={self._function_name!r}, new_version={self._new_version!r})"
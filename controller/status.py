@@ -0,0 +1,125 @@
+import logging
+import threading
+
+from controller.config import CRD_GROUP, CRD_PLURAL, CRD_VERSION, NAMESPACE, STATUS_FLUSH_INTERVAL
+from controller.telemetry import KUBERNETES_CALL_SECONDS, STATUS_WRITES, timed
+
+_written = STATUS_WRITES.labels('written')
+_skipped = STATUS_WRITES.labels('skipped')
+_conflicts = STATUS_WRITES.labels('conflict')
+_failed = STATUS_WRITES.labels('failed')
+
+VOLATILE_FIELDS = ('lastEvaluation',)
+
+
+class StatusWriter:
+    def __init__(self, custom_api, store, interval=STATUS_FLUSH_INTERVAL, namespace=NAMESPACE, max_conflicts=3):
+        self._custom_api = custom_api
+        self._store = store
+        self._interval = interval
+        self._namespace = namespace
+        self._max_conflicts = max_conflicts
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._flushed = {}
+        self._stopped = threading.Event()
+
+    def update(self, name, **fields):
+        """
+        Record status fields of a canary; they are merged with earlier updates and written on the next flush.
+        """
+        with self._lock:
+            self._pending.setdefault(name, {}).update(fields)
+
+    def forget(self, name):
+        """
+        Drop pending and remembered status of a deleted canary.
+        """
+        with self._lock:
+            self._pending.pop(name, None)
+            self._flushed.pop(name, None)
+
+    def start(self):
+        """
+        Start flushing pending status updates in a background thread.
+        """
+        threading.Thread(target=self._run, name='status-writer', daemon=True).start()
+
+    def stop(self):
+        """
+        Stop the background thread after writing what is still pending.
+        """
+        self._stopped.set()
+        self.flush()
+
+    def flush(self):
+        """
+        Write every canary's pending status as one merge-patch, skipping those that would not change anything.
+
+        Volatile fields such as lastEvaluation do not count as a change on their own; they are written along
+        with the next real one. A write that keeps conflicting is put back for the next flush.
+        """
+        from kubernetes import client
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for name, fields in pending.items():
+            canary = self._store.get(name)
+            if canary is None:
+                self.forget(name)
+                continue
+            current = self._flushed.get(name) or canary.get('status') or {}
+            if all(current.get(key) == value for key, value in fields.items() if key not in VOLATILE_FIELDS):
+                _skipped.inc()
+                continue
+            try:
+                if not self._patch(name, canary['metadata'].get('resourceVersion'), fields):
+                    logging.warning(f"Status of '{name}' kept conflicting, retrying on the next flush.")
+                    with self._lock:
+                        self._pending[name] = {**fields, **self._pending.get(name, {})}
+                    continue
+                with self._lock:
+                    self._flushed[name] = {**current, **fields}
+                _written.inc()
+            except client.rest.ApiException as e:
+                _failed.inc()
+                if e.status == 404:
+                    self.forget(name)
+                    continue
+                logging.error(f"Could not write status of '{name}': {e.reason}.")
+                with self._lock:
+                    self._pending[name] = {**fields, **self._pending.get(name, {})}
+
+    def _patch(self, name, resource_version, fields):
+        from kubernetes import client
+        for _ in range(self._max_conflicts):
+            try:
+                self._patch_status(name, {
+                    'metadata': {'resourceVersion': resource_version},
+                    'status': fields
+                })
+                return True
+            except client.rest.ApiException as e:
+                if e.status != 409:
+                    raise e
+                _conflicts.inc()
+                resource_version = self._get_status(name)['metadata']['resourceVersion']
+        return False
+
+    @timed(KUBERNETES_CALL_SECONDS, 'patch_lambdacanary_status')
+    def _patch_status(self, name, body):
+        return self._custom_api.patch_namespaced_custom_object_status(
+            CRD_GROUP, CRD_VERSION, self._namespace, CRD_PLURAL, name, body
+        )
+
+    @timed(KUBERNETES_CALL_SECONDS, 'get_lambdacanary_status')
+    def _get_status(self, name):
+        return self._custom_api.get_namespaced_custom_object_status(
+            CRD_GROUP, CRD_VERSION, self._namespace, CRD_PLURAL, name
+        )
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Status flush failed: {e}.")
@@ -0,0 +1,226 @@
+from flask import Blueprint, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+import asyncio
+import functools
+import time
+
+telemetry_bp = Blueprint('telemetry', __name__)
+
+INFORMER_OBJECTS = Gauge(
+    'lambda_canary_informer_objects',
+    'Number of LambdaCanary objects held in the informer store.'
+)
+INFORMER_STALENESS_SECONDS = Gauge(
+    'lambda_canary_informer_staleness_seconds',
+    'Seconds since the informer last heard from the API server.'
+)
+INFORMER_WATCH_LAG_SECONDS = Histogram(
+    'lambda_canary_informer_watch_lag_seconds',
+    'Delay between a LambdaCanary change on the API server and its arrival in the store.',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+INFORMER_RELISTS = Counter(
+    'lambda_canary_informer_relists_total',
+    'Number of full relists performed by the informer.'
+)
+
+WORKQUEUE_DEPTH = Gauge(
+    'lambda_canary_workqueue_depth',
+    'Number of canaries waiting in the reconcile work queue.'
+)
+WORKQUEUE_LATENCY_SECONDS = Histogram(
+    'lambda_canary_workqueue_latency_seconds',
+    'Time a canary waits in the reconcile work queue before a worker picks it up.',
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60)
+)
+WORKQUEUE_RETRIES = Counter(
+    'lambda_canary_workqueue_retries_total',
+    'Number of canaries requeued with backoff after a failed reconcile.'
+)
+WORKQUEUE_DROPPED = Counter(
+    'lambda_canary_workqueue_dropped_total',
+    'Number of canaries rejected because the reconcile work queue was full.'
+)
+
+AWS_POOL_IN_USE = Gauge(
+    'lambda_canary_aws_pool_in_use',
+    'Number of HTTP connections of a shared AWS client currently carrying a request.',
+    ['service', 'region']
+)
+AWS_POOL_SATURATION = Gauge(
+    'lambda_canary_aws_pool_saturation_ratio',
+    'Fraction of the connection pool of a shared AWS client currently in use.',
+    ['service', 'region']
+)
+
+AUTH_CACHE_LOOKUPS = Counter(
+    'lambda_canary_auth_cache_lookups_total',
+    'Number of verified-token cache lookups by result.',
+    ['result']
+)
+AUTH_DECODE_SECONDS = Histogram(
+    'lambda_canary_auth_decode_seconds',
+    'Time spent verifying and decoding JWT tokens on cache misses.',
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+AWS_CALL_SECONDS = Histogram(
+    'lambda_canary_aws_call_seconds',
+    'Latency of LambdaClient and CloudWatchClient calls.',
+    ['service', 'operation', 'result'],
+    buckets=LATENCY_BUCKETS
+)
+KUBERNETES_CALL_SECONDS = Histogram(
+    'lambda_canary_kubernetes_call_seconds',
+    'Latency of Kubernetes API calls.',
+    ['operation', 'result'],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    'lambda_canary_http_request_seconds',
+    'Latency of REST API requests per route.',
+    ['route', 'result'],
+    buckets=LATENCY_BUCKETS
+)
+RECONCILE_SECONDS = Histogram(
+    'lambda_canary_reconcile_seconds',
+    'Duration of a single canary reconcile.',
+    ['result'],
+    buckets=LATENCY_BUCKETS
+)
+EVALUATION_SECONDS = Histogram(
+    'lambda_canary_evaluation_seconds',
+    'Duration of an evaluation tick over all canaries.',
+    ['result'],
+    buckets=LATENCY_BUCKETS
+)
+ROLLOUT_STEP_SECONDS = Histogram(
+    'lambda_canary_rollout_step_seconds',
+    'Time taken to apply a rollout step to a Lambda alias.',
+    ['action'],
+    buckets=LATENCY_BUCKETS
+)
+
+STATUS_WRITES = Counter(
+    'lambda_canary_status_writes_total',
+    'Number of coalesced LambdaCanary status updates by outcome.',
+    ['result']
+)
+
+SHARD_MEMBERS = Gauge(
+    'lambda_canary_shard_members',
+    'Number of live controller replicas sharing the canaries.'
+)
+SHARD_OWNED_CANARIES = Gauge(
+    'lambda_canary_shard_owned_canaries',
+    'Number of canaries owned by this controller replica.'
+)
+
+STARTUP_SECONDS = Gauge(
+    'lambda_canary_startup_seconds',
+    'Seconds spent in each controller startup step.',
+    ['step']
+)
+
+EVENTS_PUBLISHED = Counter(
+    'lambda_canary_events_published_total',
+    'Number of rollout events published to the event stream by type.',
+    ['type']
+)
+EVENT_SUBSCRIBERS = Gauge(
+    'lambda_canary_event_subscribers',
+    'Number of clients following the rollout event stream.'
+)
+EVENTS_DROPPED_SUBSCRIBERS = Counter(
+    'lambda_canary_event_dropped_subscribers_total',
+    'Number of event stream clients dropped because they fell too far behind.'
+)
+
+SCHEDULED_CANARIES = Gauge(
+    'lambda_canary_scheduled_canaries',
+    'Number of canaries waiting for their next evaluation deadline.'
+)
+SCHEDULER_LATENESS_SECONDS = Histogram(
+    'lambda_canary_scheduler_lateness_seconds',
+    'Delay between a canary evaluation deadline and the evaluation picking it up.',
+    buckets=(0.01, 0.1, 0.5, 1, 5, 10, 30, 60)
+)
+
+JOURNAL_RECORDS = Counter(
+    'lambda_canary_journal_records_total',
+    'Number of rollout state records appended to the journal.'
+)
+JOURNAL_COMPACTIONS = Counter(
+    'lambda_canary_journal_compactions_total',
+    'Number of times the rollout journal was rewritten with only the latest records.'
+)
+RECOVERY_SECONDS = Gauge(
+    'lambda_canary_recovery_seconds',
+    'Seconds spent replaying the rollout journal on startup.'
+)
+RECOVERED_CANARIES = Gauge(
+    'lambda_canary_recovered_canaries',
+    'Number of rollouts resumed from the journal on startup.'
+)
+
+LAMBDA_CACHE_LOOKUPS = Counter(
+    'lambda_canary_lambda_cache_lookups_total',
+    'Number of Lambda version and alias metadata cache lookups by result.',
+    ['kind', 'result']
+)
+
+
+def timed(histogram, *labels):
+    """
+    Decorate a function so that its duration is observed in a histogram, labelled with labels and its result.
+
+    The labelled children are bound once at decoration time, so timing a call allocates nothing.
+    """
+    success = histogram.labels(*labels, 'success')
+    error = histogram.labels(*labels, 'error')
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException:
+                    error.observe(time.perf_counter() - started)
+                    raise
+                success.observe(time.perf_counter() - started)
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                error.observe(time.perf_counter() - started)
+                raise
+            success.observe(time.perf_counter() - started)
+            return result
+        return wrapper
+    return decorator
+
+
+def instrument_views(app):
+    """
+    Time every view function registered on a Flask application, labelled by its endpoint.
+    """
+    for endpoint, view in list(app.view_functions.items()):
+        if endpoint != 'static':
+            app.view_functions[endpoint] = timed(HTTP_REQUEST_SECONDS, endpoint)(view)
+
+
+@telemetry_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Export controller metrics in the Prometheus text format.
+    """
+    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
@@ -8,6 +8,13 @@ def format_time(timestamp):
     return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
 
 
+def parse_time(value):
+    """
+    Parse a string produced by format_time back into a UTC timestamp.
+    """
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc).timestamp()
+
+
 def is_rollback_triggered(total_request_count, error_count, policy):
     """
     Determine whether the canary version should be rolled back to the stable version.
@@ -20,6 +27,15 @@ def is_rollback_triggered(total_request_count, error_count, policy):
     return False
 
 
+def find_rollbacks(evaluation, thresholds, min_invocations=1):
+    """
+    Determine for every canary of a MetricWindowStore evaluation whether it should be rolled back.
+
+    Canaries with fewer than min_invocations invocations in the window are left to the statistical analysis.
+    """
+    return (evaluation["invocations"] >= min_invocations) & (evaluation["error_rate"] >= thresholds)
+
+
 def get_release_version(aliases):
     """
     Get the release version from the list of aliases.
@@ -0,0 +1,207 @@
+import threading
+
+import numpy as np
+
+from controller.config import METRIC_WINDOW_MINUTES
+
+WINDOW_FIELDS = ("invocations", "errors", "duration_p95", "duration_p99")
+TOTAL_FIELDS = ("invocations", "errors")
+
+
+class MetricWindowStore:
+    def __init__(self, window_minutes=METRIC_WINDOW_MINUTES, capacity=64):
+        self._lock = threading.Lock()
+        self._window = window_minutes
+        self._rows = {}
+        self._free = []
+        self._names = [None] * capacity
+        self._minutes = np.full((capacity, window_minutes), -1, dtype=np.int64)
+        self._values = {field: np.zeros((capacity, window_minutes), dtype=np.float32) for field in WINDOW_FIELDS}
+        self._settled = np.full(capacity, -1, dtype=np.int64)
+        self._totals = {field: np.zeros(capacity, dtype=np.float64) for field in TOTAL_FIELDS}
+
+    @property
+    def window_minutes(self):
+        """
+        Get the number of minutes each ring buffer holds.
+        """
+        return self._window
+
+    def merge(self, name, series):
+        """
+        Merge per-minute CloudWatch datapoints for a canary into its ring buffer.
+
+        The series maps the keys produced by BatchMetricsFetcher to lists of (timestamp, value) pairs.
+        Datapoints for a minute that is already stored replace the old value, so overlapping fetches are harmless.
+        """
+        with self._lock:
+            row = self._row(name)
+            for field in WINDOW_FIELDS:
+                for timestamp, value in series.get(field, ()):
+                    minute = int(timestamp.timestamp() // 60)
+                    slot = minute % self._window
+                    if self._minutes[row, slot] != minute:
+                        if self._minutes[row, slot] > minute:
+                            continue
+                        self._minutes[row, slot] = minute
+                        for values in self._values.values():
+                            values[row, slot] = 0
+                    self._values[field][row, slot] = value
+
+    def export(self, name):
+        """
+        Get the stored minutes of a canary as plain lists, for recording in the rollout journal.
+        """
+        with self._lock:
+            row = self._rows.get(name)
+            if row is None:
+                return None
+            mask = self._minutes[row] >= 0
+            exported = {'minutes': self._minutes[row][mask].tolist()}
+            for field in WINDOW_FIELDS:
+                exported[field] = self._values[field][row][mask].tolist()
+            exported['settled'] = int(self._settled[row])
+            exported['totals'] = {field: float(self._totals[field][row]) for field in TOTAL_FIELDS}
+            return exported
+
+    def restore(self, name, exported):
+        """
+        Load minutes recorded by export() back into the ring buffer of a canary.
+        """
+        with self._lock:
+            row = self._row(name)
+            for i, minute in enumerate(exported['minutes']):
+                slot = minute % self._window
+                if self._minutes[row, slot] > minute:
+                    continue
+                self._minutes[row, slot] = minute
+                for field in WINDOW_FIELDS:
+                    self._values[field][row, slot] = exported[field][i]
+            if 'settled' in exported:
+                self._settled[row] = exported['settled']
+                for field in TOTAL_FIELDS:
+                    self._totals[field][row] = exported['totals'][field]
+
+    def remove(self, name):
+        """
+        Drop the ring buffer of a canary.
+        """
+        with self._lock:
+            row = self._rows.pop(name, None)
+            if row is None:
+                return
+            self._names[row] = None
+            self._minutes[row] = -1
+            for values in self._values.values():
+                values[row] = 0
+            self._settled[row] = -1
+            for totals in self._totals.values():
+                totals[row] = 0
+            self._free.append(row)
+
+    def evaluate(self, now, window_minutes, names=None):
+        """
+        Compute error rates and the worst per-minute latency percentiles of every canary, or only of the given
+        names, in one vectorized pass.
+
+        Returns the canary names alongside arrays for the last window_minutes and for the window before it,
+        so callers can compare the two sliding windows. CloudWatch percentiles cannot be combined across
+        minutes, so 'max_minute_p95' and 'max_minute_p99' are the highest per-minute values, not percentiles
+        of the whole window. Raises ValueError when both windows do not fit into the ring buffer.
+        """
+        if 2 * window_minutes > self._window:
+            raise ValueError(f"Windows of {window_minutes} minutes do not fit into {self._window} stored minutes")
+        with self._lock:
+            if names is None:
+                rows = np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))
+            else:
+                rows = np.array([self._rows[name] for name in names if name in self._rows], dtype=np.int64)
+            names = [self._names[row] for row in rows]
+            minutes = self._minutes[rows]
+            values = {field: self._values[field][rows] for field in WINDOW_FIELDS}
+        current_minute = int(now.timestamp() // 60)
+        age = current_minute - minutes
+        current = (minutes >= 0) & (age >= 0) & (age < window_minutes)
+        previous = (minutes >= 0) & (age >= window_minutes) & (age < 2 * window_minutes)
+        invocations = np.where(current, values["invocations"], 0).sum(axis=1)
+        errors = np.where(current, values["errors"], 0).sum(axis=1)
+        previous_invocations = np.where(previous, values["invocations"], 0).sum(axis=1)
+        previous_errors = np.where(previous, values["errors"], 0).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            error_rate = np.where(invocations > 0, errors / invocations, 0)
+            previous_error_rate = np.where(previous_invocations > 0, previous_errors / previous_invocations, 0)
+        return {
+            "names": names,
+            "invocations": invocations,
+            "errors": errors,
+            "error_rate": error_rate,
+            "previous_error_rate": previous_error_rate,
+            "max_minute_p95": np.where(current, values["duration_p95"], 0).max(axis=1, initial=0),
+            "max_minute_p99": np.where(current, values["duration_p99"], 0).max(axis=1, initial=0),
+        }
+
+    def accumulate(self, now, names, settle_minutes):
+        """
+        Add the minutes of the given canaries that are at least settle_minutes old to their running totals.
+
+        Every minute is counted once, so the totals grow from the canary's first stored minute for as long
+        as it is accumulated at least once per ring length. Minutes arriving after they settled are ignored.
+        """
+        with self._lock:
+            rows = np.array([self._rows[name] for name in names if name in self._rows], dtype=np.int64)
+            if not len(rows):
+                return
+            boundary = int(now.timestamp() // 60) - settle_minutes
+            minutes = self._minutes[rows]
+            mask = (minutes >= 0) & (minutes >= self._settled[rows][:, None]) & (minutes < boundary)
+            for field in TOTAL_FIELDS:
+                self._totals[field][rows] += np.where(mask, self._values[field][rows], 0).sum(axis=1)
+            self._settled[rows] = np.maximum(self._settled[rows], boundary)
+
+    def totals(self, name):
+        """
+        Get the running totals of a canary, as accumulated by accumulate().
+        """
+        with self._lock:
+            row = self._rows.get(name)
+            return {field: 0.0 if row is None else float(self._totals[field][row]) for field in TOTAL_FIELDS}
+
+    def samples(self, name, now, window_minutes, field):
+        """
+        Get the stored per-minute values of one field of a canary within the last window_minutes, oldest first.
+        """
+        if window_minutes > self._window:
+            raise ValueError(f"A window of {window_minutes} minutes does not fit into {self._window} stored minutes")
+        with self._lock:
+            row = self._rows.get(name)
+            if row is None:
+                return []
+            minutes = self._minutes[row].copy()
+            values = self._values[field][row].copy()
+        age = int(now.timestamp() // 60) - minutes
+        mask = (minutes >= 0) & (age >= 0) & (age < window_minutes)
+        return values[mask][np.argsort(minutes[mask])].tolist()
+
+    def _row(self, name):
+        row = self._rows.get(name)
+        if row is not None:
+            return row
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = len(self._rows)
+            if row >= len(self._names):
+                self._grow()
+        self._rows[name] = row
+        self._names[row] = name
+        return row
+
+    def _grow(self):
+        capacity = len(self._names)
+        self._names.extend([None] * capacity)
+        self._minutes = np.concatenate([self._minutes, np.full_like(self._minutes, -1)])
+        for field, values in self._values.items():
+            self._values[field] = np.concatenate([values, np.zeros_like(values)])
+        self._settled = np.concatenate([self._settled, np.full_like(self._settled, -1)])
+        for field, totals in self._totals.items():
+            self._totals[field] = np.concatenate([totals, np.zeros_like(totals)])
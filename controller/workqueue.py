@@ -0,0 +1,202 @@
+import collections
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+
+from controller.telemetry import WORKQUEUE_DEPTH, WORKQUEUE_DROPPED, WORKQUEUE_LATENCY_SECONDS, WORKQUEUE_RETRIES
+
+
+class WorkQueue:
+    def __init__(self, max_depth=1000, qps=20, burst=50, base_delay=1, max_delay=300):
+        self._cond = threading.Condition()
+        self._queue = collections.deque()
+        self._dirty = {}
+        self._processing = set()
+        self._delayed = []
+        self._sequence = itertools.count()
+        self._failures = {}
+        self._max_depth = max_depth
+        self._qps = qps
+        self._burst = burst
+        self._tokens = burst
+        self._refilled = time.monotonic()
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._shutdown = False
+
+    def add(self, key):
+        """
+        Add a key to the queue unless it is already waiting.
+
+        A key that is being processed is queued again once its worker calls done(), so the same key
+        is never handed to two workers at once.
+        """
+        with self._cond:
+            if self._shutdown or key in self._dirty:
+                return True
+            if len(self._dirty) >= self._max_depth:
+                WORKQUEUE_DROPPED.inc()
+                logging.warning(f"Work queue is full, dropping '{key}'.")
+                return False
+            self._dirty[key] = time.monotonic()
+            if key not in self._processing:
+                self._queue.append(key)
+                WORKQUEUE_DEPTH.set(len(self._queue))
+                self._cond.notify()
+            return True
+
+    def add_after(self, key, delay):
+        """
+        Add a key to the queue once the delay in seconds has passed.
+
+        While the queue is at max_depth, due keys stay delayed until there is room.
+        """
+        if delay <= 0:
+            return self.add(key)
+        with self._cond:
+            if self._shutdown:
+                return True
+            heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._sequence), key))
+            self._cond.notify()
+            return True
+
+    def add_rate_limited(self, key):
+        """
+        Add a key to the queue after an exponential backoff with full jitter.
+        """
+        with self._cond:
+            failures = self._failures.get(key, 0)
+            self._failures[key] = failures + 1
+        WORKQUEUE_RETRIES.inc()
+        delay = random.uniform(0, min(self._max_delay, self._base_delay * 2 ** failures))
+        return self.add_after(key, delay)
+
+    def forget(self, key):
+        """
+        Reset the backoff of a key after it has been processed successfully.
+        """
+        with self._cond:
+            self._failures.pop(key, None)
+
+    def get(self):
+        """
+        Block until a key is ready and a rate limiter token is available, then hand it out for processing.
+
+        Returns None once the queue has been shut down.
+        """
+        with self._cond:
+            while True:
+                if self._shutdown:
+                    return None
+                now = time.monotonic()
+                self._promote_delayed(now)
+                wait = self._next_wait(now)
+                if self._queue and wait <= 0:
+                    self._tokens -= 1
+                    key = self._queue.popleft()
+                    WORKQUEUE_LATENCY_SECONDS.observe(now - self._dirty.pop(key))
+                    WORKQUEUE_DEPTH.set(len(self._queue))
+                    self._processing.add(key)
+                    return key
+                self._cond.wait(wait)
+
+    def done(self, key):
+        """
+        Mark a key as processed, requeueing it if it was added again meanwhile.
+        """
+        with self._cond:
+            self._processing.discard(key)
+            if key in self._dirty:
+                self._queue.append(key)
+                WORKQUEUE_DEPTH.set(len(self._queue))
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout=None):
+        """
+        Block until no key is queued, delayed or being processed. Returns False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._processing or self._delayed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def shut_down(self):
+        """
+        Stop handing out keys and wake up all waiting workers.
+        """
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._queue)
+
+    def _promote_delayed(self, now):
+        while self._delayed and self._delayed[0][0] <= now:
+            key = self._delayed[0][2]
+            if key not in self._dirty and len(self._dirty) >= self._max_depth:
+                break
+            heapq.heappop(self._delayed)
+            if key in self._dirty:
+                continue
+            self._dirty[key] = now
+            if key not in self._processing:
+                self._queue.append(key)
+        WORKQUEUE_DEPTH.set(len(self._queue))
+
+    def _next_wait(self, now):
+        self._tokens = min(self._burst, self._tokens + (now - self._refilled) * self._qps)
+        self._refilled = now
+        waits = []
+        if self._queue:
+            waits.append(0 if self._tokens >= 1 else (1 - self._tokens) / self._qps)
+        if self._delayed and len(self._dirty) < self._max_depth:
+            waits.append(self._delayed[0][0] - now)
+        return min(waits) if waits else None
+
+
+class WorkerPool:
+    def __init__(self, queue, handler, workers):
+        self._queue = queue
+        self._handler = handler
+        self._workers = workers
+        self._threads = []
+
+    def start(self):
+        """
+        Start the worker threads.
+        """
+        for i in range(self._workers):
+            thread = threading.Thread(target=self._run, name=f"reconcile-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """
+        Shut down the queue and wait for in-flight keys to finish.
+        """
+        self._queue.shut_down()
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self):
+        while True:
+            key = self._queue.get()
+            if key is None:
+                return
+            try:
+                self._handler(key)
+                self._queue.forget(key)
+            except Exception as e:
+                logging.error(f"Could not reconcile '{key}': {e}.")
+                self._queue.add_rate_limited(key)
+            finally:
+                self._queue.done(key)
@@ -0,0 +1,55 @@
+import time
+from unittest import mock
+
+import jwt
+import pytest
+
+from controller.config import JWT_SECRET
+from controller.context import ControllerContext
+
+CANARY = {
+    'metadata': {'name': 'orders', 'resourceVersion': '1'},
+    'functionName': 'orders',
+    'newVersion': '2',
+    'oldVersion': '1',
+    'alias': 'live',
+    'policy': {'step': 10, 'threshold': 0.05, 'cooldown': 60},
+}
+
+
+@pytest.fixture
+def api():
+    with mock.patch.object(ControllerContext, '_load_kube_config', return_value=True), \
+            mock.patch('kubernetes.client.CustomObjectsApi') as custom_objects_api:
+        from controller import api
+        api.context._components.pop('CustomObjectsApi', None)
+        api.context.informer.store.replace([CANARY], '1')
+        yield api, custom_objects_api.return_value
+
+
+def put(api, name, body):
+    claims = {'sub': 'test', 'roles': ['deployer'], 'exp': int(time.time()) + 60}
+    token = jwt.encode(claims, JWT_SECRET, algorithm='HS256')
+    return api.app.test_client().put(f'/canary/{name}', json=body, headers={'Authorization': f'Bearer {token}'})
+
+
+def test_put_merges_policy_fields(api):
+    api, custom_objects_api = api
+    response = put(api, 'orders', {'policy': {'step': 20}})
+    assert response.status_code == 200
+    patch = custom_objects_api.patch_namespaced_custom_object.call_args[0][-1]
+    assert patch['policy'] == {'step': 20, 'threshold': 0.05, 'cooldown': 60}
+    assert patch['alias'] == 'live'
+    assert patch['newVersion'] == '2'
+
+
+def test_put_validates_the_merged_spec(api):
+    api, custom_objects_api = api
+    response = put(api, 'orders', {'newVersion': 'v3', 'policy': {'step': 0}})
+    assert response.status_code == 400
+    assert response.get_json()['errors'] == [
+        r"'newVersion' must match ^(\$LATEST|[0-9]+)$",
+        "'policy.step' must be at least 1",
+    ]
+    assert put(api, 'orders', [1]).get_json()['errors'] == ["Request body must be an object"]
+    custom_objects_api.patch_namespaced_custom_object.assert_not_called()
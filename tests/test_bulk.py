@@ -0,0 +1,94 @@
+from controller.bulk import run_bulk, validate_operations
+
+CANARY = {
+    'metadata': {'name': 'orders'},
+    'functionName': 'orders',
+    'newVersion': '2',
+    'oldVersion': '1',
+    'policy': {'step': 10, 'threshold': 0.05, 'cooldown': 60},
+}
+
+
+def test_operations_must_be_a_non_empty_list():
+    assert validate_operations([], {}) == ["'operations' must be a non-empty list"]
+    assert validate_operations({'op': 'create'}, {}) == ["'operations' must be a non-empty list"]
+
+
+def test_create_validates_the_spec():
+    operations = [
+        dict(CANARY, op='create', name='payments', waves=[['us-east-1'], ['eu-west-1']]),
+        dict(CANARY, op='create', name='refunds', newVersion='v2'),
+        {'op': 'create', 'name': 'invoices', 'functionName': 'invoices'},
+    ]
+    assert validate_operations(operations, {}) == [
+        None,
+        r"'newVersion' must match ^(\$LATEST|[0-9]+)$",
+        "Create requires functionName, newVersion, oldVersion, policy",
+    ]
+
+
+def test_update_validates_the_merged_spec():
+    store = {'orders': CANARY}
+    assert validate_operations([{'op': 'update', 'name': 'orders', 'policy': {'step': 20}}], store) == [None]
+    assert validate_operations([{'op': 'update', 'name': 'orders', 'policy': {'step': 0}}], store) == [
+        "'policy.step' must be at least 1"
+    ]
+    assert validate_operations([{'op': 'update', 'name': 'orders', 'regions': []}], store) == [
+        "'regions' must have at least 1 items"
+    ]
+
+
+def test_names_must_exist_once():
+    store = {'orders': CANARY}
+    operations = [
+        {'op': 'delete', 'name': 'orders'},
+        {'op': 'delete', 'name': 'orders'},
+        {'op': 'update', 'name': 'payments'},
+        dict(CANARY, op='create', name='orders'),
+        {'op': 'rename', 'name': 'orders'},
+        {'op': 'delete', 'name': 'Orders'},
+    ]
+    assert validate_operations(operations, store) == [
+        None,
+        "Canary 'orders' appears more than once",
+        "No canary deployment found with name payments",
+        "Canary 'orders' appears more than once",
+        "Unknown operation 'rename'",
+        "Invalid canary name 'Orders'",
+    ]
+
+
+class FakeCustomObjectsApi:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.patches = []
+        self.deleted = []
+
+    def create_namespaced_custom_object(self, group, version, namespace, plural, body):
+        if body['metadata']['name'] in self.failing:
+            raise RuntimeError('create failed')
+
+    def patch_namespaced_custom_object(self, group, version, namespace, plural, name, patch):
+        self.patches.append((name, patch))
+
+    def delete_namespaced_custom_object(self, group, version, namespace, plural, name):
+        self.deleted.append(name)
+
+
+def test_atomic_undo_removes_policy_keys_the_update_added():
+    api = FakeCustomObjectsApi(failing=['payments'])
+    operations = [
+        {'op': 'update', 'name': 'orders', 'policy': {'step': 20, 'prewarm': {'concurrency': 5}}},
+        dict(CANARY, op='create', name='payments'),
+    ]
+    results = run_bulk(api, {'orders': CANARY}, operations, atomic=True)
+    assert [result['status'] for result in results] == ['rolled_back', 'error']
+    assert api.patches[-1] == ('orders', {
+        'functionName': 'orders',
+        'newVersion': '2',
+        'oldVersion': '1',
+        'policy': {'step': 10, 'threshold': 0.05, 'cooldown': 60, 'prewarm': None},
+        'alias': None,
+        'regions': None,
+        'waves': None,
+    })
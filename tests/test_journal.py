@@ -0,0 +1,90 @@
+import json
+
+from controller.journal import RolloutJournal
+
+
+def read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_replay_returns_the_latest_record_of_each_canary(tmp_path):
+    path = str(tmp_path / 'rollouts.journal')
+    journal = RolloutJournal(path)
+    journal.replay()
+    journal.record('a', weight=10)
+    journal.record('b', weight=10)
+    journal.record('a', weight=20)
+    journal.close()
+    assert RolloutJournal(path).replay() == {'a': {'name': 'a', 'weight': 20}, 'b': {'name': 'b', 'weight': 10}}
+
+
+def test_replay_drops_canaries_with_a_tombstone(tmp_path):
+    path = str(tmp_path / 'rollouts.journal')
+    journal = RolloutJournal(path)
+    journal.replay()
+    journal.record('a', weight=10)
+    journal.record('b', weight=10)
+    journal.forget('a')
+    journal.close()
+    assert list(RolloutJournal(path).replay()) == ['b']
+
+
+def test_record_after_tombstone_resumes_the_canary(tmp_path):
+    path = tmp_path / 'rollouts.journal'
+    path.write_text('{"name":"a","weight":10}\n{"name":"a","deleted":true}\n{"name":"a","weight":30}\n')
+    assert RolloutJournal(str(path)).replay() == {'a': {'name': 'a', 'weight': 30}}
+
+
+def test_forget_of_an_unknown_canary_appends_nothing(tmp_path):
+    path = str(tmp_path / 'rollouts.journal')
+    journal = RolloutJournal(path)
+    journal.replay()
+    journal.forget('a')
+    journal.close()
+    assert read_records(path) == []
+
+
+def test_replay_ignores_a_torn_tail(tmp_path):
+    path = tmp_path / 'rollouts.journal'
+    path.write_text('{"name":"a","weight":10}\n{"name":"a","weight":20}\n{"name":"a","wei')
+    journal = RolloutJournal(str(path))
+    assert journal.replay() == {'a': {'name': 'a', 'weight': 20}}
+    journal.record('b', weight=10)
+    journal.close()
+    assert read_records(str(path)) == [{'name': 'a', 'weight': 20}, {'name': 'b', 'weight': 10}]
+
+
+def test_replay_skips_unreadable_records(tmp_path):
+    path = tmp_path / 'rollouts.journal'
+    path.write_text('{"name":"a","weight":10}\nnot json\n{"weight":5}\n{"name":"b","weight":10}\n')
+    assert sorted(RolloutJournal(str(path)).replay()) == ['a', 'b']
+
+
+def test_replay_of_a_missing_or_empty_journal(tmp_path):
+    assert RolloutJournal(str(tmp_path / 'missing' / 'rollouts.journal')).replay() == {}
+    path = tmp_path / 'rollouts.journal'
+    path.write_bytes(b'')
+    assert RolloutJournal(str(path)).replay() == {}
+
+
+def test_replay_compacts_the_journal(tmp_path):
+    path = tmp_path / 'rollouts.journal'
+    path.write_text('{"name":"a","weight":10}\n{"name":"b","weight":10}\n{"name":"a","weight":20}\n'
+                    '{"name":"b","deleted":true}\n')
+    RolloutJournal(str(path)).replay()
+    assert read_records(str(path)) == [{'name': 'a', 'weight': 20}]
+
+
+def test_appends_are_compacted_past_the_ratio(tmp_path):
+    path = str(tmp_path / 'rollouts.journal')
+    journal = RolloutJournal(path, compact_ratio=2)
+    journal.replay()
+    for weight in range(2 * 64):
+        journal.record('a', weight=weight)
+    assert len(read_records(path)) == 2 * 64
+    journal.record('a', weight=200)
+    assert read_records(path) == [{'name': 'a', 'weight': 200}]
+    journal.record('a', weight=201)
+    journal.close()
+    assert RolloutJournal(path).replay() == {'a': {'name': 'a', 'weight': 201}}
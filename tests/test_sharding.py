@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from urllib3.exceptions import MaxRetryError
+
+from controller.sharding import ShardCoordinator
+
+
+def make_coordinator(api):
+    with mock.patch('kubernetes.client.CoordinationV1Api', return_value=api):
+        return ShardCoordinator(identity='replica-a', namespace='default', lease_duration=15, renew_interval=5)
+
+
+def test_ownership_lapses_when_renewals_keep_failing():
+    api = mock.Mock()
+    spec = SimpleNamespace(holder_identity='replica-a', renew_time='t0', lease_duration_seconds=15)
+    lease = SimpleNamespace(spec=spec)
+    api.list_namespaced_lease.return_value = SimpleNamespace(items=[lease])
+    coordinator = make_coordinator(api)
+    members = []
+    coordinator.add_handler(members.append)
+    with mock.patch('controller.sharding.time.monotonic', return_value=100.0) as monotonic:
+        assert not coordinator.owns('default', 'orders')
+        coordinator._round()
+        assert coordinator.owns('default', 'orders')
+
+        api.patch_namespaced_lease.side_effect = MaxRetryError(None, '/', 'connection refused')
+        monotonic.return_value = 110.0
+        coordinator._round()
+        assert coordinator.owns('default', 'orders')
+        monotonic.return_value = 116.0
+        coordinator._round()
+        assert not coordinator.owns('default', 'orders')
+
+        api.patch_namespaced_lease.side_effect = None
+        monotonic.return_value = 120.0
+        coordinator._round()
+        assert coordinator.owns('default', 'orders')
+    assert members == [{'replica-a'}, {'replica-a'}]
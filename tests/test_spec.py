@@ -0,0 +1,92 @@
+from controller.spec import CanarySpec, merge_spec, validate_spec, validate_update
+
+SPEC = {
+    'functionName': 'orders',
+    'newVersion': '2',
+    'oldVersion': '1',
+    'policy': {'step': 10, 'threshold': 0.05, 'cooldown': 60},
+}
+
+
+def test_valid_spec():
+    assert validate_spec(SPEC) == []
+
+
+def test_body_must_be_an_object():
+    assert validate_spec(None) == ["Request body must be an object"]
+    assert validate_spec([SPEC], partial=True) == ["Request body must be an object"]
+
+
+def test_missing_required_fields():
+    errors = validate_spec({'functionName': 'orders'})
+    assert errors == ["'newVersion' is required", "'oldVersion' is required", "'policy' is required"]
+
+
+def test_partial_skips_top_level_required_fields_only():
+    assert validate_spec({'newVersion': '3'}, partial=True) == []
+    assert validate_spec({'policy': {'step': 10}}, partial=True) == [
+        "'policy.threshold' is required",
+        "'policy.cooldown' is required",
+    ]
+
+
+def test_type_errors():
+    errors = validate_spec(dict(SPEC, functionName=5, policy=dict(SPEC['policy'], step=True)))
+    assert errors == ["'functionName' must be of type string", "'policy.step' must be of type integer"]
+
+
+def test_bounds():
+    errors = validate_spec(dict(SPEC, functionName='', policy={'step': 0, 'threshold': 1.5, 'cooldown': -1}))
+    assert errors == [
+        "'functionName' must be at least 1 characters long",
+        "'policy.step' must be at least 1",
+        "'policy.threshold' must be at most 1",
+        "'policy.cooldown' must be at least 0",
+    ]
+    assert validate_spec(dict(SPEC, functionName='f' * 141)) == ["'functionName' must be at most 140 characters long"]
+
+
+def test_patterns():
+    assert validate_spec(dict(SPEC, newVersion='$LATEST')) == []
+    assert validate_spec(dict(SPEC, newVersion='v2')) == [r"'newVersion' must match ^(\$LATEST|[0-9]+)$"]
+    assert validate_spec(dict(SPEC, alias='live!')) == ["'alias' must match ^[a-zA-Z0-9_-]{1,128}$"]
+
+
+def test_arrays():
+    assert validate_spec(dict(SPEC, waves=[['us-east-1'], ['eu-west-1', 'eu-central-1']])) == []
+    assert validate_spec(dict(SPEC, regions=[])) == ["'regions' must have at least 1 items"]
+    assert validate_spec(dict(SPEC, waves=[['us-east-1'], ['']])) == [
+        "'waves[1][0]' must be at least 1 characters long"
+    ]
+    assert validate_spec(dict(SPEC, waves=['us-east-1'])) == ["'waves[0]' must be of type array"]
+
+
+def test_nested_required_fields():
+    errors = validate_spec(dict(SPEC, policy=dict(SPEC['policy'], prewarm={'invocations': 2})))
+    assert errors == ["'policy.prewarm.concurrency' is required"]
+
+
+def test_merge_spec_merges_the_policy():
+    merged = merge_spec(dict(SPEC, status={'phase': 'Progressing'}), {'newVersion': '3', 'policy': {'step': 20}})
+    assert merged['newVersion'] == '3'
+    assert merged['policy'] == {'step': 20, 'threshold': 0.05, 'cooldown': 60}
+    assert merged['status'] == {'phase': 'Progressing'}
+    assert validate_spec(merged) == []
+
+
+def test_merge_spec_replaces_other_fields():
+    merged = merge_spec(dict(SPEC, regions=['us-east-1']), {'regions': ['eu-west-1'], 'policy': None})
+    assert merged['regions'] == ['eu-west-1']
+    assert validate_spec(merged) == ["'policy' must be of type object"]
+
+
+def test_validate_update_checks_the_merged_spec():
+    assert validate_update(SPEC, {'policy': {'step': 20}}) == []
+    assert validate_update(SPEC, {'policy': {'cooldown': -1}}) == ["'policy.cooldown' must be at least 0"]
+    assert validate_update(SPEC, {'newVersion': None}) == ["'newVersion' must be of type string"]
+    assert validate_update(SPEC, None) == ["Request body must be an object"]
+
+
+def test_spec_round_trip_keeps_optional_fields():
+    body = dict(SPEC, alias='live', regions=['us-east-1', 'eu-west-1'], waves=[['us-east-1'], ['eu-west-1']])
+    assert CanarySpec.from_dict(body).to_dict() == body